@@ -0,0 +1,398 @@
+"""Benchmarks of the pymitv hot paths against a simulated TV.
+
+Run from the repository root:
+
+    python benchmarks/run.py           compare with benchmarks/baseline.json
+    python benchmarks/run.py --update  record a new baseline
+
+The simulated TV answers every request after a fixed latency. Each round of
+a benchmark is timed together with a reference measured right before it: a
+single round trip to the simulated TV, or for the benchmarks bound by the
+CPU a fixed sort. Their ratio, how many references a benchmark takes, is
+what the baseline records. It doesn't depend on the speed or the load of
+the machine the way the timings do. A benchmark whose ratio grows over the
+baseline by more than the tolerance fails the run.
+
+The proxy benchmarks need Home Assistant installed, they are skipped
+otherwise.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'custom_components', 'xiaomi_tv'))
+
+import pymitv  # noqa: E402
+from app_pages import app_pages, page_title, search_apps  # noqa: E402
+
+try:
+    import hass_web_proxy_lib  # noqa: E402
+    from homeassistant.components.http import KEY_AUTHENTICATED  # noqa: E402
+except ImportError:
+    hass_web_proxy_lib = None
+
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+# Seconds the simulated TV takes to answer
+LATENCY = 0.005
+
+# Requests the simulated TV handles at once
+MAX_CONNECTIONS = 4
+
+APP_COUNT = 500
+ICON_REQUESTS = 50
+BROWSES = 50
+
+# Sorts of the app names making the reference of the CPU bound benchmarks
+REFERENCE_SORTS = 300
+
+ROUNDS = 20
+WARMUP = 2
+
+# Allowed growth of a ratio over the baseline, 1.0 fails at twice it
+TOLERANCE = 1.0
+
+BENCHMARKS = {}
+
+
+def benchmark(rounds=ROUNDS, reference='round_trip', proxy=False):
+    """Registers a benchmark, a coroutine taking the environment.
+
+    The reference names the work the benchmark is measured against, proxy
+    tells it needs the proxy.
+    """
+    def register(func):
+        BENCHMARKS[func.__name__] = (func, rounds, reference, proxy)
+        return func
+    return register
+
+
+class Environment:
+    """The simulated TV and the clients the benchmarks use."""
+
+    def __init__(self, simulator, session):
+        self.simulator = simulator
+        self.session = session
+        self.ip_address = simulator.ip_address
+        self.tv = pymitv.AsyncTV(
+            self.ip_address, session, wait_delay=0, port=simulator.port
+        )
+        self.control = self.tv.control
+        # The app list of the simulated TV, fetched once
+        self.apps = None
+        # The proxy and the session of its clients, when available
+        self.proxy_url = None
+        self.proxy_session = None
+
+    async def installed_apps(self):
+        """Returns the app list of the simulated TV."""
+        if self.apps is None:
+            self.apps = await self.tv.get_installed_apps()
+        return self.apps
+
+    async def fetch_proxied(self, url):
+        """Downloads a URL through the proxy."""
+        async with self.proxy_session.get(
+            self.proxy_url, params={'url': url}
+        ) as response:
+            assert response.status == 200
+            await response.read()
+
+
+async def round_trip(env):
+    """The reference of the benchmarks bound by the network, one request."""
+    assert await env.control.check_state(env.ip_address)
+
+
+async def sorts(env):
+    """The reference of the benchmarks bound by the CPU, sorting names."""
+    names = [app['AppName'] for app in await env.installed_apps()]
+    for _ in range(REFERENCE_SORTS):
+        sorted(names, key=str.casefold)
+
+
+REFERENCES = {
+    'round_trip': round_trip,
+    'cpu': sorts,
+}
+
+
+@benchmark()
+async def single_key(env):
+    """One keystroke."""
+    assert await env.control.send_keystrokes(env.ip_address, ['enter'])
+
+
+@benchmark()
+async def macro(env):
+    """A source switch through the sources menu."""
+    env.tv.source = 'hdmi1'
+    assert await env.tv.set_source('dtmb')
+
+
+@benchmark(rounds=5)
+async def volume_sweep(env):
+    """Stepping the volume up by 50 and back down."""
+    env.tv.supports_set_volume = False
+    env.simulator.volume = 0
+    env.tv.volume = None
+    assert await env.tv.set_volume(50)
+    assert await env.tv.set_volume(0)
+
+
+@benchmark()
+async def mute(env):
+    """The mute polyfill, 30 volume down steps."""
+    assert await env.control.mute(env.ip_address)
+
+
+@benchmark(rounds=5)
+async def subnet_scan(env):
+    """Scanning a /24 network for the TV."""
+    found = [
+        ip_address async for ip_address in pymitv.Discover().async_scan(
+            network='127.0.0.0/24', port=env.simulator.port
+        )
+    ]
+    assert found == [env.ip_address]
+
+
+@benchmark()
+async def app_list(env):
+    """Fetching and parsing the list of installed apps."""
+    apps = await env.tv.get_installed_apps()
+    assert len(apps) == APP_COUNT
+
+
+@benchmark(reference='cpu')
+async def browse_pages(env):
+    """Sorting and paging the app list, and searching it, as browses do.
+
+    Unlike the others this one is bound by the CPU, so it repeats the work
+    of BROWSES browses to rise above the timer noise.
+    """
+    apps = await env.installed_apps()
+    for _ in range(BROWSES):
+        pages = app_pages(apps)
+        assert sum(map(len, pages)) == APP_COUNT
+        for page in pages:
+            page_title(page)
+        assert search_apps(apps, 'app 1')
+
+
+@benchmark(rounds=5)
+async def icon_downloads(env):
+    """Downloading a page of icons straight from the TV at once."""
+    apps = (await env.tv.get_installed_apps())[:ICON_REQUESTS]
+
+    async def fetch(app):
+        url = app['IconURL'].replace('\\', '')
+        async with env.session.get(url) as response:
+            assert response.status == 200
+            await response.read()
+
+    await asyncio.gather(*(fetch(app) for app in apps))
+
+
+@benchmark(rounds=5, proxy=True)
+async def proxy_icons(env):
+    """Downloading a page of icons through the proxy at once."""
+    apps = (await env.installed_apps())[:ICON_REQUESTS]
+    await asyncio.gather(*(
+        env.fetch_proxied(app['IconURL'].replace('\\', '')) for app in apps
+    ))
+
+
+@benchmark(proxy=True)
+async def proxy_shared(env):
+    """Downloading the same icon through the proxy for many clients at once.
+
+    The requests arriving while the icon is fetched share that fetch.
+    """
+    url = (await env.installed_apps())[0]['IconURL'].replace('\\', '')
+    await asyncio.gather(*(
+        env.fetch_proxied(url) for _ in range(ICON_REQUESTS)
+    ))
+
+
+def proxy_view(session):
+    """Returns the library proxy the icon view is built on, to any URL.
+
+    The icon view itself keeps its icons in the storage of Home Assistant.
+    """
+    class BenchmarkProxy(hass_web_proxy_lib.ProxyView):
+        def _get_proxied_url(self, request, **kwargs):
+            return hass_web_proxy_lib.ProxiedURL(
+                request.query['url'], allow_unauthenticated=True
+            )
+
+    return BenchmarkProxy(session)
+
+
+@web.middleware
+async def anonymous(request, handler):
+    """Marks the requests as not authenticated, like Home Assistant."""
+    request[KEY_AUTHENTICATED] = False
+    return await handler(request)
+
+
+async def timed(func, env):
+    """Returns how long a run of the coroutine took, in seconds."""
+    start = time.perf_counter()
+    await func(env)
+    return time.perf_counter() - start
+
+
+async def measure(func, rounds, reference, env):
+    """Returns the timings of a benchmark and of its reference, in seconds.
+
+    The reference runs right before each round, so both see the same load
+    of the machine.
+    """
+    for _ in range(WARMUP):
+        await reference(env)
+        await func(env)
+    timings = []
+    references = []
+    for _ in range(rounds):
+        references.append(await timed(reference, env))
+        timings.append(await timed(func, env))
+    return timings, references
+
+
+async def run(names):
+    """Runs the benchmarks and returns their median timings and ratios.
+
+    The ratio of a benchmark is the median of its rounds over their
+    references, None when the benchmark can't run here.
+    """
+    simulator = pymitv.SimulatedTV(
+        port=0,
+        latency=LATENCY,
+        max_connections=MAX_CONNECTIONS,
+        apps=[
+            ('App {}'.format(number), 'com.example.app{}'.format(number))
+            for number in range(APP_COUNT)
+        ],
+        seed=0,
+    )
+    await simulator.start()
+    proxy = None
+    results = {}
+    try:
+        async with aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=MAX_CONNECTIONS)
+        ) as session, aiohttp.ClientSession() as proxy_session:
+            env = Environment(simulator, session)
+            if hass_web_proxy_lib is not None:
+                # The proxy reaches the TV over the session of pymitv, its
+                # clients over their own, as many connections as they like
+                app = web.Application(middlewares=[anonymous])
+                app.router.add_get('/proxy', proxy_view(session).get)
+                proxy = web.AppRunner(app, access_log=None)
+                await proxy.setup()
+                site = web.TCPSite(proxy, '127.0.0.1', 0)
+                await site.start()
+                env.proxy_url = 'http://127.0.0.1:{}/proxy'.format(
+                    proxy.addresses[0][1]
+                )
+                env.proxy_session = proxy_session
+            for name in names:
+                func, rounds, reference, needs_proxy = BENCHMARKS[name]
+                if needs_proxy and env.proxy_url is None:
+                    results[name] = (None, None)
+                    continue
+                timings, references = await measure(
+                    func, rounds, REFERENCES[reference], env
+                )
+                results[name] = (
+                    statistics.median(timings),
+                    statistics.median(
+                        timing / base
+                        for timing, base in zip(timings, references)
+                    ),
+                )
+    finally:
+        if proxy is not None:
+            await proxy.cleanup()
+        await simulator.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        'names', nargs='*', metavar='name',
+        help='benchmarks to run, all by default: {}'.format(
+            ', '.join(BENCHMARKS)
+        ),
+    )
+    parser.add_argument(
+        '--update', action='store_true',
+        help='record the results as the new baseline',
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=TOLERANCE,
+        help='allowed growth over the baseline (default %(default)s)',
+    )
+    args = parser.parse_args()
+
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error('unknown benchmarks: {}'.format(', '.join(unknown)))
+
+    results = asyncio.run(run(args.names or list(BENCHMARKS)))
+
+    baseline = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE) as file:
+            baseline = json.load(file)
+
+    regressions = []
+    print('{:<18} {:>10} {:>10} {:>10} {:>8}'.format(
+        'benchmark', 'median ms', 'ratio', 'base', 'change'
+    ))
+    for name, (median, ratio) in results.items():
+        if ratio is None:
+            print('{:<18} {:>10}'.format(name, 'skipped'))
+            continue
+        base = baseline.get(name)
+        change = ''
+        if base:
+            growth = ratio / base
+            change = '{:+.0%}'.format(growth - 1)
+            if growth > 1 + args.tolerance:
+                regressions.append(name)
+                change += ' !'
+        print('{:<18} {:>10.2f} {:>10.2f} {:>10} {:>8}'.format(
+            name, median * 1000, ratio,
+            '{:.2f}'.format(base) if base else '-', change
+        ))
+
+    if args.update:
+        baseline.update({
+            name: round(ratio, 3)
+            for name, (_, ratio) in results.items() if ratio is not None
+        })
+        with open(BASELINE, 'w') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+            file.write('\n')
+        print('Baseline updated')
+        return 0
+
+    if regressions:
+        print('Slower than the baseline: {}'.format(', '.join(regressions)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
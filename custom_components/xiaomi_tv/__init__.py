@@ -2,13 +2,22 @@
 
 from __future__ import annotations
 
+import homeassistant.helpers.config_validation as cv
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
+from homeassistant.const import CONF_HOST, Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
-from .proxy import MyProxyView
+from .const import (CONF_KEY_DELAY, CONF_WAIT_DELAY, DATA_PROXY_VIEW,
+                    DEFAULT_KEY_DELAY, DEFAULT_WAIT_DELAY, DOMAIN)
+from .fleet import async_get_fleet
+from .icon_cache import IconCache
+from .proxy import MyProxyView, ProxyMetricsView
+from .services import async_setup_services
+
+# TVs are configured in the UI, or in YAML under their platforms
+CONFIG_SCHEMA = cv.platform_only_config_schema(DOMAIN)
 
 PLATFORMS: list[str] = [
     Platform.MEDIA_PLAYER,
@@ -16,19 +25,43 @@ PLATFORMS: list[str] = [
 ]
 
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the services shared by all the TVs."""
+    async_setup_services(hass)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up oiot from a config entry."""
-    # Исправлено: используем импортированный async_get_clientsession
-    websession = async_get_clientsession(hass)
-    hass.http.register_view(MyProxyView(websession))
     if DOMAIN not in hass.data:
         hass.data[DOMAIN] = {}
+    # The proxy and its icon cache are shared by all the TVs.
+    if DATA_PROXY_VIEW not in hass.data[DOMAIN]:
+        # Исправлено: используем импортированный async_get_clientsession
+        websession = async_get_clientsession(hass)
+        view = MyProxyView(hass, websession, IconCache(hass))
+        hass.http.register_view(view)
+        hass.http.register_view(ProxyMetricsView(view.metrics))
+        hass.data[DOMAIN][DATA_PROXY_VIEW] = view
     if entry.unique_id not in hass.data[DOMAIN]:
         hass.data[DOMAIN][entry.unique_id] = {}
+    # The fleet polls the TV in the background, on the shared schedule, so
+    # a sleeping TV doesn't hold up the setup.
+    async_get_fleet(hass).async_get_coordinator(
+        entry.data[CONF_HOST],
+        wait_delay=entry.options.get(CONF_WAIT_DELAY, DEFAULT_WAIT_DELAY),
+        key_delay=entry.options.get(CONF_KEY_DELAY, DEFAULT_KEY_DELAY),
+    )
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     try:
@@ -39,4 +72,5 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             unload_ok = True
     if unload_ok:
         hass.data[DOMAIN].pop(entry.unique_id)
+        await async_get_fleet(hass).async_remove(entry.data[CONF_HOST])
     return unload_ok
@@ -0,0 +1,38 @@
+"""Ordering, paging and search of the apps of a Xiaomi TV."""
+
+from __future__ import annotations
+
+from typing import Any
+
+# Apps per directory, keeps the payload and the icon fetches small
+PAGE_SIZE = 40
+
+
+def sorted_apps(apps: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Return the apps sorted by name."""
+    return sorted(apps, key=lambda item: item['AppName'].casefold())
+
+
+def app_pages(
+    apps: list[dict[str, Any]], size: int = PAGE_SIZE
+) -> list[list[dict[str, Any]]]:
+    """Return the sorted apps split in pages of at most size apps."""
+    apps = sorted_apps(apps)
+    return [apps[start:start + size] for start in range(0, len(apps), size)]
+
+
+def page_title(page: list[dict[str, Any]]) -> str:
+    """Return the title of a page, the first and the last app on it."""
+    return f"{page[0]['AppName']} – {page[-1]['AppName']}"
+
+
+def search_apps(
+    apps: list[dict[str, Any]], search_query: str, limit: int = PAGE_SIZE
+) -> list[dict[str, Any]]:
+    """Return the sorted apps whose name or package matches the query."""
+    query = search_query.casefold()
+    return [
+        item for item in sorted_apps(apps)
+        if query in item['AppName'].casefold()
+        or query in item['PackageName'].casefold()
+    ][:limit]
@@ -0,0 +1,112 @@
+"""Cache of the apps installed on a Xiaomi TV."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Any
+
+import aiohttp
+from homeassistant.core import HomeAssistant, callback
+
+from . import pymitv
+from .const import DOMAIN
+
+LOGGER = logging.getLogger(__name__)
+
+APP_LIST_TTL = timedelta(minutes=15)
+
+RECENT_APPS = 10
+
+
+def app_icon_url(item: dict[str, Any]) -> str:
+    """Return the icon URL of an app, as the TV escapes slashes."""
+    return item['IconURL'].replace('\\', '')
+
+
+def icon_id(url: str) -> str:
+    """Return the opaque id the proxy serves an icon URL under."""
+    return hashlib.sha256(url.encode()).hexdigest()[:32]
+
+
+class AppCatalog:
+    """Serve the app list of a TV from memory, refreshing it when stale.
+
+    A stale list is returned right away while a fresh one is fetched in the
+    background, so only the first browse, and the first one after the list
+    is invalidated, waits for the TV.
+    """
+
+    def __init__(self, hass: HomeAssistant, tv: pymitv.AsyncTV) -> None:
+        """Initialize the catalog."""
+        self._hass = hass
+        self._tv = tv
+        self._apps: list[dict[str, Any]] | None = None
+        self._fetched = 0.0
+        self._refresh: asyncio.Task | None = None
+        self._icon_urls: dict[str, str] = {}
+        self.recent: deque[str] = deque(maxlen=RECENT_APPS)
+
+    @property
+    def expired(self) -> bool:
+        """Return whether the list should be fetched again."""
+        return time.monotonic() - self._fetched > APP_LIST_TTL.total_seconds()
+
+    async def async_get(self) -> list[dict[str, Any]]:
+        """Return the installed apps."""
+        if self._apps is None:
+            try:
+                await asyncio.shield(self._async_start_refresh())
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                LOGGER.warning(error)
+                return []
+        elif self.expired:
+            self._async_start_refresh()
+        return self._apps
+
+    def resolve_icon(self, icon: str) -> str | None:
+        """Return the URL of an icon in the list, by its id."""
+        return self._icon_urls.get(icon)
+
+    @callback
+    def async_launched(self, package: str) -> None:
+        """Remember an app as the most recently launched one."""
+        if package in self.recent:
+            self.recent.remove(package)
+        self.recent.appendleft(package)
+
+    @callback
+    def async_invalidate(self) -> None:
+        """Drop the list, so the next access waits for a fresh one."""
+        self._apps = None
+        self._icon_urls = {}
+        self._fetched = 0.0
+
+    @callback
+    def _async_start_refresh(self) -> asyncio.Task:
+        """Fetch the list, sharing the request already in flight."""
+        if self._refresh is None or self._refresh.done():
+            self._refresh = self._hass.async_create_background_task(
+                self._async_refresh(), f'{DOMAIN} {self._tv.ip_address} apps')
+        return self._refresh
+
+    async def _async_refresh(self) -> None:
+        """Fetch the list from the TV."""
+        try:
+            apps = await self._tv.get_installed_apps()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            if self._apps is None:
+                raise
+            LOGGER.debug('Keeping the stale app list: %s', error)
+            return
+        LOGGER.debug(apps)
+        self._apps = apps
+        self._icon_urls = {
+            icon_id(url): url
+            for url in map(app_icon_url, apps)
+        }
+        self._fetched = time.monotonic()
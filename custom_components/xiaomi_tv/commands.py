@@ -0,0 +1,212 @@
+"""Scheduling of the commands sent to a Xiaomi TV."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+LOGGER = logging.getLogger(__name__)
+
+VOLUME_DEBOUNCE = 0.2
+
+
+class Priority(IntEnum):
+    """Order in which queued commands are sent, lowest first."""
+
+    POWER = 0
+    NAVIGATION = 1
+    VOLUME = 2
+
+
+@dataclass(order=True)
+class _Command:
+    """A command waiting in the queue."""
+
+    priority: int
+    sequence: int
+    key: Hashable | None = field(compare=False)
+    factory: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    queued: float = field(compare=False)
+    # Submitters still waiting for the result
+    waiters: int = field(default=0, compare=False)
+
+
+class CommandQueue:
+    """Send the commands of one TV one at a time, by priority.
+
+    Macros are never interleaved with other keys. Commands submitted with
+    the key of a command still waiting share its result instead of being
+    queued again. Cancelling the last submitter of a command drops it while
+    it waits and interrupts it while it runs.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Initialize the queue."""
+        self._name = name
+        self._queue: asyncio.PriorityQueue[_Command] = asyncio.PriorityQueue()
+        self._pending: dict[Hashable, _Command] = {}
+        self._sequence = itertools.count()
+        self._worker: asyncio.Task | None = None
+        self.processed = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._total_latency = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Return the number of commands waiting to be sent."""
+        return self._queue.qsize()
+
+    @property
+    def metrics(self) -> dict[str, Any]:
+        """Return the queue depth and the command latencies in seconds."""
+        return {
+            'depth': self.depth,
+            'processed': self.processed,
+            'last_latency': round(self.last_latency, 3),
+            'average_latency': round(
+                self._total_latency / self.processed, 3
+            ) if self.processed else 0.0,
+            'max_latency': round(self.max_latency, 3),
+        }
+
+    def start(self) -> None:
+        """Start sending the queued commands."""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._async_run())
+
+    async def async_stop(self) -> None:
+        """Stop the worker and drop the waiting commands."""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.wait([self._worker])
+            self._worker = None
+        while not self._queue.empty():
+            self._queue.get_nowait().future.cancel()
+        self._pending.clear()
+
+    async def async_submit(
+        self,
+        priority: Priority,
+        factory: Callable[[], Awaitable[Any]],
+        key: Hashable | None = None,
+    ) -> Any:
+        """Queue a command and return its result once it has been sent."""
+        command = self._pending.get(key) if key is not None else None
+        if command is None or command.future.done():
+            command = _Command(
+                priority=priority,
+                sequence=next(self._sequence),
+                key=key,
+                factory=factory,
+                future=asyncio.get_running_loop().create_future(),
+                queued=time.monotonic(),
+            )
+            if key is not None:
+                self._pending[key] = command
+                command.future.add_done_callback(
+                    lambda _, command=command: self._forget(command))
+            self._queue.put_nowait(command)
+
+        command.waiters += 1
+        try:
+            return await asyncio.shield(command.future)
+        finally:
+            command.waiters -= 1
+            if not command.waiters and not command.future.done():
+                # The last submitter gave up, drop or interrupt the command
+                command.future.cancel()
+
+    def _forget(self, command: _Command) -> None:
+        """Stop sharing a command that is done or cancelled."""
+        if self._pending.get(command.key) is command:
+            del self._pending[command.key]
+
+    async def _async_run(self) -> None:
+        """Send the queued commands one after another."""
+        while True:
+            command = await self._queue.get()
+            self._forget(command)
+            if command.future.done():
+                continue
+
+            task = asyncio.create_task(command.factory())
+            command.future.add_done_callback(
+                lambda _, task=task: task.cancel())
+            try:
+                await asyncio.wait([task])
+            except asyncio.CancelledError:
+                task.cancel()
+                command.future.cancel()
+                raise
+
+            if not command.future.done():
+                if task.cancelled():
+                    command.future.cancel()
+                elif task.exception() is not None:
+                    command.future.set_exception(task.exception())
+                else:
+                    command.future.set_result(task.result())
+            elif not task.cancelled() and task.exception() is not None:
+                LOGGER.debug(
+                    'Dropped command for %s failed: %s',
+                    self._name, task.exception())
+
+            latency = time.monotonic() - command.queued
+            self.processed += 1
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            self._total_latency += latency
+
+
+class VolumeCoalescer:
+    """Send only the latest requested volume to the TV.
+
+    A new target cancels the step sequence still running for an older one,
+    so quick slider drags end in a single adjustment to the last value.
+    """
+
+    def __init__(
+        self,
+        set_volume: Callable[[int], Awaitable[Any]],
+        debounce: float = VOLUME_DEBOUNCE,
+    ) -> None:
+        """Initialize the coalescer."""
+        self._set_volume = set_volume
+        self._debounce = debounce
+        self._task: asyncio.Task | None = None
+        self.target: int | None = None
+
+    async def async_set(self, volume: int) -> bool:
+        """Request a volume and wait until it is set or superseded.
+
+        Return whether this request was the one sent to the TV.
+        """
+        self.target = volume
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        task = self._task = asyncio.create_task(self._async_send(volume))
+        await asyncio.wait([task])
+        if task.cancelled():
+            return False
+        # Surface errors of the request to the caller
+        task.result()
+        return True
+
+    async def _async_send(self, volume: int) -> None:
+        """Wait for the drag to settle, then set the volume."""
+        await asyncio.sleep(self._debounce)
+        await self._set_volume(volume)
+
+    def cancel(self) -> None:
+        """Cancel the pending volume change."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -2,13 +2,20 @@
 from __future__ import annotations
 
 from typing import Any
+from urllib.parse import urlparse
 
 import voluptuous
 from homeassistant import config_entries
 from homeassistant.const import CONF_HOST, CONF_NAME
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.service_info.ssdp import (ATTR_UPNP_FRIENDLY_NAME,
+                                                     SsdpServiceInfo)
 
-from .const import DOMAIN
+from . import pymitv
+from .const import (CONF_KEY_DELAY, CONF_WAIT_DELAY, DEFAULT_KEY_DELAY,
+                    DEFAULT_NAME, DEFAULT_WAIT_DELAY, DOMAIN)
 
 STEP_USER_DATA_SCHEMA = voluptuous.Schema(
     {
@@ -23,6 +30,18 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    def __init__(self) -> None:
+        """Initialize the flow."""
+        self._discovered: dict[str, Any] = {}
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -38,3 +57,71 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             return self.async_create_entry(
                 title=user_input[CONF_NAME],
                 data=user_input)
+
+    async def async_step_ssdp(
+        self, discovery_info: SsdpServiceInfo
+    ) -> FlowResult:
+        """Handle a TV announced over SSDP."""
+        host = urlparse(discovery_info.ssdp_location).hostname
+        name = discovery_info.upnp.get(ATTR_UPNP_FRIENDLY_NAME, DEFAULT_NAME)
+
+        await self.async_set_unique_id(f'{DOMAIN}_{host}')
+        self._abort_if_unique_id_configured()
+
+        # Other Xiaomi renderers announce themselves the same way, only the
+        # TVs answer on the controller port.
+        if not await pymitv.Discover.async_check_ip(
+            async_get_clientsession(self.hass), host
+        ):
+            return self.async_abort(reason='not_xiaomi_tv')
+
+        self._discovered = {CONF_NAME: name, CONF_HOST: host}
+        self.context['title_placeholders'] = {'name': name}
+        return await self.async_step_discovery_confirm()
+
+    async def async_step_discovery_confirm(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Confirm the setup of a discovered TV."""
+        if user_input is None:
+            self._set_confirm_only()
+            return self.async_show_form(
+                step_id='discovery_confirm',
+                description_placeholders=self._discovered
+            )
+
+        return self.async_create_entry(
+            title=self._discovered[CONF_NAME],
+            data=self._discovered)
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the macro timings of a Xiaomi TV"""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title='', data=user_input)
+
+        options = self.config_entry.options
+        delay = voluptuous.All(
+            voluptuous.Coerce(float), voluptuous.Range(min=0, max=5))
+        return self.async_show_form(
+            step_id='init',
+            data_schema=voluptuous.Schema(
+                {
+                    voluptuous.Required(
+                        CONF_WAIT_DELAY,
+                        default=options.get(
+                            CONF_WAIT_DELAY, DEFAULT_WAIT_DELAY)
+                    ): delay,
+                    voluptuous.Required(
+                        CONF_KEY_DELAY,
+                        default=options.get(
+                            CONF_KEY_DELAY, DEFAULT_KEY_DELAY)
+                    ): delay,
+                }
+            )
+        )
@@ -1 +1,26 @@
+from datetime import timedelta
+
 DOMAIN = 'xiaomi_tv'
+
+DEFAULT_NAME = 'Xiaomi TV'
+
+# Macro timings, in seconds
+DEFAULT_WAIT_DELAY = 0.7
+DEFAULT_KEY_DELAY = 0.0
+
+CONF_NETWORK = 'network'
+CONF_WAIT_DELAY = 'wait_delay'
+CONF_KEY_DELAY = 'key_delay'
+
+SOURCES = ['hdmi1', 'hdmi2', 'cast']
+
+# The app mirroring phones, selected as the cast source
+CAST_APP = 'com.xiaomi.mitv.smartshare'
+
+DATA_FLEET = 'fleet'
+DATA_PROXY_VIEW = 'proxy_view'
+
+SERVICE_BROADCAST = 'broadcast'
+
+# How long discovered TV addresses are trusted without a network sweep
+DISCOVERY_TTL = timedelta(days=1)
@@ -0,0 +1,123 @@
+"""Polling of the Xiaomi TV state shared by its entities."""
+
+from __future__ import annotations
+
+import logging
+import time
+from datetime import timedelta
+from typing import Any
+
+import aiohttp
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import (DataUpdateCoordinator,
+                                                      UpdateFailed)
+
+from . import pymitv
+from .apps import AppCatalog
+from .const import DOMAIN
+
+LOGGER = logging.getLogger(__name__)
+
+# Right after a command, poll quickly to pick up its effect
+FAST_POLL_INTERVAL = timedelta(seconds=2)
+FAST_POLL_DURATION = timedelta(seconds=10)
+
+POLL_INTERVAL = timedelta(seconds=15)
+OFF_POLL_INTERVAL = timedelta(seconds=60)
+
+# Unreachable TVs are polled less and less often, up to this interval
+MAX_POLL_INTERVAL = timedelta(minutes=5)
+
+POLL_TIMEOUT = 3
+
+
+class XiaomiTVCoordinator(DataUpdateCoordinator[dict[str, Any]]):
+    """Poll the power state and volume of a TV.
+
+    Each poll costs a single request: getVolume while the TV is on, which
+    doubles as the liveness check, and the smaller isalive while it is off.
+    The interval follows the state of the TV, the fleet starts the polls
+    once next_poll has passed.
+    """
+
+    def __init__(self, hass: HomeAssistant, tv: pymitv.AsyncTV) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            LOGGER,
+            name=f'{DOMAIN} {tv.ip_address}',
+        )
+        self.tv = tv
+        self.apps = AppCatalog(hass, tv)
+        self._config_id = f'{DOMAIN}_{tv.ip_address}'
+        self._failures = 0
+        self._fast_until = 0.0
+        # Monotonic time of the next poll
+        self.next_poll = 0.0
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        """Fetch the power state and the volume of the TV."""
+        try:
+            return await self._async_poll()
+        except (KeyError, TypeError, ValueError) as error:
+            self._failures += 1
+            raise UpdateFailed(
+                f'Unexpected answer from {self.tv.ip_address}: {error!r}'
+            ) from error
+        finally:
+            # Whatever happened, the fleet must not poll again right away
+            self.next_poll = (
+                time.monotonic() + self._next_interval().total_seconds())
+
+    async def _async_poll(self) -> dict[str, Any]:
+        """Send the poll request and record its outcome."""
+        probe = self.tv.probe
+        if probe.is_on is False:
+            reachable = await self.tv.control.check_state(self.tv.ip_address)
+        else:
+            try:
+                volume = await self.tv.get_volume(timeout=POLL_TIMEOUT)
+            except aiohttp.ClientError as error:
+                LOGGER.debug(
+                    'Polling %s failed: %s', self.tv.ip_address, error)
+                volume = False
+            reachable = volume is not False
+        probe.record(reachable)
+
+        self._failures = 0 if reachable else self._failures + 1
+
+        data = self.hass.data[DOMAIN].get(self._config_id)
+        if data is not None and probe.is_on is not None:
+            data['state'] = STATE_ON if probe.is_on else STATE_OFF
+
+        return {
+            'reachable': reachable,
+            'is_on': probe.is_on,
+            'volume': self.tv.volume,
+            'max_volume': self.tv.max_volume,
+        }
+
+    def _next_interval(self) -> timedelta:
+        """Return the interval until the next poll."""
+        if time.monotonic() < self._fast_until:
+            return FAST_POLL_INTERVAL
+        interval = (
+            OFF_POLL_INTERVAL if self.tv.probe.is_on is False
+            else POLL_INTERVAL)
+        if self._failures:
+            # The probe soon reports an unreachable TV as off, back off
+            # from there too.
+            interval = max(interval, min(
+                POLL_INTERVAL * 2 ** (self._failures - 1), MAX_POLL_INTERVAL))
+        return interval
+
+    @callback
+    def async_command_sent(self) -> None:
+        """Poll quickly for a while after a command."""
+        self._fast_until = (
+            time.monotonic() + FAST_POLL_DURATION.total_seconds())
+        self._failures = 0
+        self.next_poll = (
+            time.monotonic() + FAST_POLL_INTERVAL.total_seconds())
+        self.hass.async_create_task(self.async_request_refresh())
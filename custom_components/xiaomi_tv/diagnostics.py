@@ -0,0 +1,27 @@
+"""Diagnostics support for the Xiaomi TV integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_PROXY_VIEW, DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    data = hass.data[DOMAIN].get(entry.unique_id, {})
+    commands = data.get('commands')
+    view = hass.data[DOMAIN].get(DATA_PROXY_VIEW)
+    proxy = view.metrics.as_dict() if view is not None else {}
+    return {
+        'state': data.get('state'),
+        'source': data.get('source'),
+        'commands': commands.metrics if commands is not None else None,
+        'proxy': proxy.get(entry.data[CONF_HOST]),
+    }
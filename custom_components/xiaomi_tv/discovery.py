@@ -0,0 +1,61 @@
+"""Cache of the Xiaomi TVs discovered on the network."""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DISCOVERY_TTL, DOMAIN
+
+STORAGE_KEY = f'{DOMAIN}.discovery'
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+
+
+class DiscoveryCache:
+    """Remember discovered TV addresses between Home Assistant restarts."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY)
+        self._hosts: dict[str, float] = {}
+        self._scanned: float = 0
+
+    async def async_load(self) -> list[str]:
+        """Load the cache and return the hosts seen within the TTL."""
+        data = await self._store.async_load() or {}
+        expire = time.time() - DISCOVERY_TTL.total_seconds()
+        self._hosts = {
+            host: seen
+            for host, seen in data.get('hosts', {}).items()
+            if seen > expire
+        }
+        self._scanned = data.get('scanned', 0)
+        return list(self._hosts)
+
+    @property
+    def scan_expired(self) -> bool:
+        """Return whether the network should be swept again."""
+        return not self._hosts or (
+            time.time() - self._scanned > DISCOVERY_TTL.total_seconds())
+
+    @callback
+    def async_seen(self, host: str) -> None:
+        """Record that a TV answered at the host."""
+        self._hosts[host] = time.time()
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def async_scanned(self) -> None:
+        """Record that the network has been swept."""
+        self._scanned = time.time()
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to store."""
+        return {'hosts': self._hosts, 'scanned': self._scanned}
@@ -0,0 +1,267 @@
+"""Resources and scheduling shared by all the Xiaomi TVs."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any
+
+import aiohttp
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE, STATE_OFF, STATE_ON
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from . import pymitv
+from .commands import Priority
+from .const import DATA_FLEET, DOMAIN
+from .coordinator import POLL_INTERVAL, XiaomiTVCoordinator
+
+LOGGER = logging.getLogger(__name__)
+
+# How often the schedule looks for TVs due for a poll
+POLL_TICK = timedelta(seconds=1)
+
+# Seconds between the first polls of TVs set up together
+POLL_STAGGER = 0.5
+
+# Polls running at once across all the TVs
+POLL_CONCURRENCY = 8
+
+# TVs a group command is sent to at once
+GROUP_CONCURRENCY = 16
+
+# Connections kept open to a single TV, and to all the TVs together
+POOL_SIZE = 4
+MAX_CONNECTIONS = 100
+
+# Idle connections are closed after this many seconds
+KEEPALIVE_TIMEOUT = 60
+
+
+class XiaomiTVFleet:
+    """All the TVs of the integration, run as one.
+
+    The TVs share a single HTTP session, whose connector keeps at most
+    POOL_SIZE keep-alive connections per TV, and a single poll schedule that
+    spreads the polls over time and caps how many run at once, so a venue
+    full of TVs costs one timer and a bounded number of sockets.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the fleet."""
+        self._hass = hass
+        self._session: aiohttp.ClientSession | None = None
+        self._coordinators: dict[str, XiaomiTVCoordinator] = {}
+        self._polling: set[str] = set()
+        self._polls = asyncio.Semaphore(POLL_CONCURRENCY)
+        self._unsub_tick: CALLBACK_TYPE | None = None
+
+    @property
+    def hosts(self) -> list[str]:
+        """Return the addresses of the TVs."""
+        return list(self._coordinators)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Return the HTTP session shared by the TVs."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=MAX_CONNECTIONS,
+                    limit_per_host=POOL_SIZE,
+                    keepalive_timeout=KEEPALIVE_TIMEOUT,
+                )
+            )
+        return self._session
+
+    @callback
+    def async_get_coordinator(
+        self, host: str, **tv_options: Any
+    ) -> XiaomiTVCoordinator:
+        """Return the coordinator of the TV, adding the TV when needed."""
+        data = self._hass.data[DOMAIN].setdefault(f'{DOMAIN}_{host}', {})
+        if host not in self._coordinators:
+            tv = pymitv.AsyncTV(
+                host, self.session, assume_state=False, **tv_options)
+            coordinator = XiaomiTVCoordinator(self._hass, tv)
+            # Spread the first polls of the TVs over a poll interval
+            coordinator.next_poll = time.monotonic() + (
+                len(self._coordinators) * POLL_STAGGER
+                % POLL_INTERVAL.total_seconds()
+            )
+            self._coordinators[host] = coordinator
+            if self._unsub_tick is None:
+                self._unsub_tick = async_track_time_interval(
+                    self._hass, self._async_tick, POLL_TICK)
+        data['coordinator'] = self._coordinators[host]
+        return self._coordinators[host]
+
+    async def async_remove(self, host: str) -> None:
+        """Stop polling the TV."""
+        coordinator = self._coordinators.pop(host, None)
+        if coordinator is not None:
+            await coordinator.async_shutdown()
+        if not self._coordinators and self._unsub_tick is not None:
+            self._unsub_tick()
+            self._unsub_tick = None
+
+    async def async_close(self) -> None:
+        """Stop the schedule and close the connections."""
+        for host in self.hosts:
+            await self.async_remove(host)
+        if self._session is not None:
+            await self._session.close()
+
+    @callback
+    def _async_tick(self, now: datetime) -> None:
+        """Start the polls that are due."""
+        monotonic = time.monotonic()
+        for host, coordinator in self._coordinators.items():
+            if host in self._polling or coordinator.next_poll > monotonic:
+                continue
+            self._polling.add(host)
+            self._hass.async_create_background_task(
+                self._async_poll(host, coordinator), f'{DOMAIN} {host} poll')
+
+    async def _async_poll(
+        self, host: str, coordinator: XiaomiTVCoordinator
+    ) -> None:
+        """Poll a TV, waiting for a slot when many are due."""
+        try:
+            async with self._polls:
+                await coordinator.async_refresh()
+        finally:
+            self._polling.discard(host)
+
+    async def async_run(
+        self,
+        command: Callable[[pymitv.AsyncTV], Awaitable[Any]],
+        hosts: Iterable[str] | None = None,
+        priority: Priority = Priority.NAVIGATION,
+        key: Hashable | None = None,
+        concurrency: int = GROUP_CONCURRENCY,
+    ) -> dict[str, Any]:
+        """Send a command to many TVs at once.
+
+        The command goes through the queue of each TV, so it is ordered
+        with the commands of its entities. Returns the result of each TV,
+        or the exception it failed with.
+        """
+        hosts = self.hosts if hosts is None else list(hosts)
+        slots = asyncio.Semaphore(concurrency)
+
+        async def run(host: str) -> Any:
+            async with slots:
+                return await self._async_send(host, command, priority, key)
+
+        results = await asyncio.gather(
+            *(run(host) for host in hosts), return_exceptions=True)
+        return dict(zip(hosts, results))
+
+    async def _async_send(
+        self,
+        host: str,
+        command: Callable[[pymitv.AsyncTV], Awaitable[Any]],
+        priority: Priority,
+        key: Hashable | None,
+    ) -> Any:
+        """Send a command to a TV and poll it quickly afterwards."""
+        coordinator = self._coordinators[host]
+        commands = self._hass.data[DOMAIN][f'{DOMAIN}_{host}'].get('commands')
+        factory = partial(command, coordinator.tv)
+        try:
+            if commands is None:
+                return await factory()
+            return await commands.async_submit(priority, factory, key)
+        finally:
+            coordinator.async_command_sent()
+
+    async def async_turn_off(
+        self, hosts: Iterable[str] | None = None
+    ) -> dict[str, Any]:
+        """Put the TVs to sleep.
+
+        TVs already off are left alone, the power key would wake them up,
+        and are missing from the results.
+        """
+        results = await self.async_run(
+            pymitv.AsyncTV.sleep,
+            self.async_power_changes(hosts, False),
+            Priority.POWER,
+            ('power', 'sleep'),
+        )
+        self.async_expect_power(results, False)
+        return results
+
+    async def async_turn_on(
+        self, hosts: Iterable[str] | None = None
+    ) -> dict[str, Any]:
+        """Wake the TVs up.
+
+        TVs already on are left alone, the power key would put them to
+        sleep, and are missing from the results.
+        """
+        results = await self.async_run(
+            pymitv.AsyncTV.wake,
+            self.async_power_changes(hosts, True),
+            Priority.POWER,
+            ('power', 'wake'),
+        )
+        self.async_expect_power(results, True)
+        return results
+
+    @callback
+    def async_power_changes(
+        self, hosts: Iterable[str] | None, is_on: bool
+    ) -> list[str]:
+        """Return the TVs not in the power state yet.
+
+        The power key toggles, so it must only reach these. The state is
+        the one the entities show, as they check it before the same macro.
+        """
+        target = STATE_ON if is_on else STATE_OFF
+        return [
+            host for host in (self.hosts if hosts is None else hosts)
+            if self._hass.data[DOMAIN][f'{DOMAIN}_{host}'].get(
+                'state', STATE_OFF) != target
+        ]
+
+    @callback
+    def async_expect_power(
+        self, results: dict[str, Any], is_on: bool
+    ) -> None:
+        """Assume the new power state of the TVs the command reached."""
+        for host, result in results.items():
+            if isinstance(result, BaseException) or result is False:
+                continue
+            self._coordinators[host].tv.probe.expect(is_on)
+            self._hass.data[DOMAIN][f'{DOMAIN}_{host}'].update(
+                {'state': STATE_ON if is_on else STATE_OFF})
+
+
+@callback
+def async_get_fleet(hass: HomeAssistant) -> XiaomiTVFleet:
+    """Return the fleet of TVs, creating it on first use."""
+    hass.data.setdefault(DOMAIN, {})
+    if DATA_FLEET not in hass.data[DOMAIN]:
+        fleet = XiaomiTVFleet(hass)
+        hass.data[DOMAIN][DATA_FLEET] = fleet
+
+        async def _async_close_fleet(event: Event) -> None:
+            await fleet.async_close()
+
+        hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_CLOSE, _async_close_fleet)
+    return hass.data[DOMAIN][DATA_FLEET]
+
+
+@callback
+def async_get_coordinator(
+    hass: HomeAssistant, host: str, **tv_options: Any
+) -> XiaomiTVCoordinator:
+    """Return the coordinator of the TV, creating it when needed."""
+    return async_get_fleet(hass).async_get_coordinator(host, **tv_options)
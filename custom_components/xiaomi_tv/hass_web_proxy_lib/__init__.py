@@ -2,7 +2,13 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+import itertools
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from http import HTTPStatus
 from ipaddress import ip_address
 from logging import Logger, getLogger
@@ -15,9 +21,28 @@ from aiohttp.web_exceptions import HTTPBadGateway
 from homeassistant.components.http import KEY_AUTHENTICATED, HomeAssistantView
 from homeassistant.util.ssl import get_default_context
 from multidict import CIMultiDict
+from yarl import URL
+
+from .metrics import ProxyMetrics
 
 LOGGER: Logger = getLogger(__package__)
 
+# Bytes of a shared response kept for requests joining it late, once past
+# this the response is only delivered to the requests already waiting, the
+# chunks all of them have read are dropped and upstream is read no faster
+# than the slowest one, so a shared response never holds more than this
+SHARED_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Bytes read from upstream before each write to the client, together with
+# the write waiting for the transport to drain this bounds the memory used
+# by a request regardless of the size of the response
+CHUNK_SIZE = 64 * 1024
+
+# Methods whose request body, if any, is not forwarded
+BODYLESS_METHODS = frozenset(
+    {hdrs.METH_GET, hdrs.METH_HEAD, hdrs.METH_OPTIONS}
+)
+
 if TYPE_CHECKING:
     import ssl
 
@@ -71,17 +96,123 @@ class ProxiedURL:
     headers: LooseHeaders | None = None
 
 
+@dataclass
+class _Flight:
+    """An upstream response shared by concurrent identical requests."""
+
+    status: int = HTTPStatus.BAD_GATEWAY
+    headers: dict[str, str] = field(default_factory=dict)
+    content_type: str = "application/octet-stream"
+    chunks: deque[bytes] = field(default_factory=deque)
+    # Chunks dropped from the front of chunks, and the bytes still held
+    dropped: int = 0
+    buffered: int = 0
+    size: int = 0
+    # Whether new requests may join, which needs the body from the start
+    shared: bool = True
+    error: BaseException | None = None
+    finished: bool = False
+    task: asyncio.Task | None = None
+    started: asyncio.Event = field(default_factory=asyncio.Event)
+    _positions: dict[int, int] = field(default_factory=dict)
+    _readers: Iterator[int] = field(default_factory=itertools.count)
+    _changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def waiters(self) -> int:
+        """Return the number of requests receiving the response."""
+        return len(self._positions)
+
+    def join(self) -> int:
+        """Add a request reading the body from the start."""
+        reader = next(self._readers)
+        self._positions[reader] = 0
+        return reader
+
+    def leave(self, reader: int) -> None:
+        """Remove a request, whatever it hasn't read yet is not needed."""
+        del self._positions[reader]
+        self._trim()
+
+    def stop_sharing(self) -> None:
+        """Keep only the chunks the requests already waiting have to read."""
+        self.shared = False
+        self._trim()
+
+    def publish(self, chunk: bytes) -> None:
+        """Hand a chunk of the body to the waiters."""
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+        self.buffered += len(chunk)
+        self._wake()
+
+    def finish(self, error: BaseException | None = None) -> None:
+        """Mark the body as complete, or failed."""
+        self.error = error
+        self.finished = True
+        self.started.set()
+        self._wake()
+
+    async def wait_drained(self, limit: int) -> None:
+        """Wait until the waiters have read all but limit bytes."""
+        while self.buffered > limit:
+            await self._changed.wait()
+
+    def _trim(self) -> None:
+        """Drop the chunks every waiter has read."""
+        if self.shared:
+            return
+        oldest = min(
+            self._positions.values(),
+            default=self.dropped + len(self.chunks)
+        )
+        if oldest <= self.dropped:
+            return
+        while self.dropped < oldest:
+            self.buffered -= len(self.chunks.popleft())
+            self.dropped += 1
+        self._wake()
+
+    def _wake(self) -> None:
+        """Wake up the waiters."""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def iter_chunks(self, reader: int) -> AsyncIterator[bytes]:
+        """Yield the whole body, from the first chunk on."""
+        while True:
+            index = self._positions[reader]
+            if index - self.dropped < len(self.chunks):
+                chunk = self.chunks[index - self.dropped]
+                self._positions[reader] = index + 1
+                self._trim()
+                yield chunk
+            elif self.finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            else:
+                await self._changed.wait()
+
+
 class ProxyView(HomeAssistantView):
     """HomeAssistant view."""
 
     requires_auth = False
 
+    # Requests to one upstream host at a time, more wait for their turn so
+    # a burst can't take all the connections of the shared session
+    upstream_concurrency = 4
+
     def __init__(
         self,
         websession: aiohttp.ClientSession,
     ) -> None:
         """Initialize the HASS Web Proxy view."""
         self._websession = websession
+        self._flights: dict[tuple[str, ...], _Flight] = {}
+        self._upstream_limits: dict[str, asyncio.Semaphore] = {}
+        self.metrics = ProxyMetrics()
 
     async def get(
         self,
@@ -123,6 +254,16 @@ class ProxyView(HomeAssistantView):
 
         return url
 
+    def upstream_limit(self, url: ProxiedURL) -> asyncio.Semaphore:
+        """Return the semaphore bounding the requests to the URL's host."""
+        parsed = URL(url.url)
+        host = f"{parsed.host}:{parsed.port}"
+        if host not in self._upstream_limits:
+            self._upstream_limits[host] = asyncio.Semaphore(
+                self.upstream_concurrency
+            )
+        return self._upstream_limits[host]
+
     def _get_proxied_url(
             self,
             request: web.Request,
@@ -140,21 +281,93 @@ class ProxyView(HomeAssistantView):
             request,
             **kwargs
         )
-        LOGGER.warning(url_or_response)
         if isinstance(url_or_response, web.Response):
             return url_or_response
+        self.metrics.count("requests", upstream_host(url_or_response))
+        return await self._proxy(request, url_or_response)
 
-        data = await request.read()
-        source_header = _init_header(request, url_or_response.headers)
-
-        async with self._websession.request(
+    async def _proxy(
+        self,
+        request: web.Request,
+        url: ProxiedURL,
+    ) -> web.StreamResponse:
+        """Stream the upstream response, shared when possible."""
+        LOGGER.debug("Proxying %s to %s", request.rel_url, url.url)
+        key = self._flight_key(request, url)
+        if key is None:
+            return await self._proxy_request(request, url)
+        return await self._proxy_shared_request(request, url, key)
+
+    @asynccontextmanager
+    async def _upstream(
+        self,
+        method: str,
+        url: ProxiedURL,
+        **kwargs: Any,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Send a request upstream within the limit of its host.
+
+        Records how long the upstream took to answer, and the failures. A
+        timeout is raised as a ServerTimeoutError, a ClientError the view
+        answers with a 502.
+        """
+        host = upstream_host(url)
+        async with self.upstream_limit(url):
+            started = time.monotonic()
+            try:
+                async with self._websession.request(
+                    method,
+                    url.url,
+                    params=url.query_params,
+                    allow_redirects=False,
+                    ssl=url.ssl_context or get_default_context(),
+                    **kwargs,
+                ) as result:
+                    self.metrics.observe_latency(
+                        host,
+                        time.monotonic() - started
+                    )
+                    yield result
+            except aiohttp.ClientError as err:
+                self.metrics.count_error(host, err)
+                raise
+            except asyncio.TimeoutError as err:
+                self.metrics.count_error(host, err)
+                raise aiohttp.ServerTimeoutError(
+                    f"Timeout fetching {url.url}") from err
+
+    @staticmethod
+    def _flight_key(
+        request: web.Request,
+        url: ProxiedURL,
+    ) -> tuple[str, ...] | None:
+        """Return what identical requests have in common, if shareable.
+
+        Only whole GET responses are shared, they don't depend on the client
+        beyond the forwarding headers.
+        """
+        if request.method != hdrs.METH_GET or hdrs.RANGE in request.headers:
+            return None
+        return flight_key(url)
+
+    async def _proxy_request(
+        self,
+        request: web.Request,
+        url: ProxiedURL,
+    ) -> web.StreamResponse:
+        """Stream the upstream response of a single request."""
+        data = None
+        if request.method not in BODYLESS_METHODS and request.body_exists:
+            # Stream the body upstream instead of buffering it
+            data = request.content.iter_chunked(CHUNK_SIZE)
+        source_header = _init_header(request, url.headers)
+        host = upstream_host(url)
+
+        async with self._upstream(
             request.method,
-            url_or_response.url,
+            url,
             headers=source_header,
-            params=url_or_response.query_params,
-            allow_redirects=False,
             data=data,
-            ssl=url_or_response.ssl_context or get_default_context(),
         ) as result:
             headers = _response_header(result)
 
@@ -167,8 +380,9 @@ class ProxyView(HomeAssistantView):
 
             try:
                 await response.prepare(request)
-                async for data in result.content.iter_any():
+                async for data in result.content.iter_chunked(CHUNK_SIZE):
                     await response.write(data)
+                    self.metrics.count("bytes_sent", host, len(data))
 
             except (aiohttp.ClientError, aiohttp.ClientPayloadError) as err:
                 LOGGER.error("Stream error for %s: %s", request.rel_url, err)
@@ -178,6 +392,190 @@ class ProxyView(HomeAssistantView):
 
             return response
 
+    async def _proxy_shared_request(
+        self,
+        request: web.Request,
+        url: ProxiedURL,
+        key: tuple[str, ...],
+    ) -> web.StreamResponse:
+        """Stream the upstream response shared with identical requests.
+
+        The first request starts the upstream fetch, the ones arriving while
+        it runs are fed the same chunks instead of opening their own.
+        """
+        flight, reader = self._join_flight(
+            key,
+            url,
+            _init_header(request, url.headers)
+        )
+        try:
+            await flight.started.wait()
+            if flight.error is not None:
+                raise flight.error
+            return await self._stream_flight(request, url, flight, reader)
+        finally:
+            self._leave_flight(key, flight, reader)
+
+    def _join_flight(
+        self,
+        key: tuple[str, ...],
+        url: ProxiedURL,
+        source_header: LooseHeaders,
+        **kwargs: Any,
+    ) -> tuple[_Flight, int]:
+        """Join the shared fetch of the key, starting it if there is none.
+
+        The headers and the keyword arguments of the upstream request only
+        apply when the fetch starts here.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            flight.task = asyncio.create_task(
+                self._fetch_flight(flight, key, url, source_header, **kwargs)
+            )
+        return flight, flight.join()
+
+    def _leave_flight(
+        self,
+        key: tuple[str, ...],
+        flight: _Flight,
+        reader: int,
+    ) -> None:
+        """Leave the shared fetch, cancelling it once nobody waits for it."""
+        flight.leave(reader)
+        if not flight.waiters and not flight.finished:
+            # Nobody wants the response anymore
+            self._release_flight(key, flight)
+            flight.task.cancel()
+
+    async def _stream_flight(
+        self,
+        request: web.Request,
+        url: ProxiedURL,
+        flight: _Flight,
+        reader: int,
+        head: bytes = b"",
+    ) -> web.StreamResponse:
+        """Stream the shared response to the client.
+
+        The head is the start of the body the request already read from the
+        flight, it is written before the chunks the reader hasn't read yet.
+        """
+        host = upstream_host(url)
+        response = web.StreamResponse(
+            status=flight.status,
+            headers=flight.headers
+        )
+        response.content_type = flight.content_type
+
+        try:
+            await response.prepare(request)
+            if head:
+                await response.write(head)
+                self.metrics.count("bytes_sent", host, len(head))
+            async for data in flight.iter_chunks(reader):
+                await response.write(data)
+                self.metrics.count("bytes_sent", host, len(data))
+
+        except (aiohttp.ClientError, aiohttp.ClientPayloadError) as err:
+            LOGGER.error("Stream error for %s: %s", request.rel_url, err)
+        except ConnectionResetError:
+            # Connection is reset/closed by peer.
+            pass
+
+        return response
+
+    async def _fetch_flight(
+        self,
+        flight: _Flight,
+        key: tuple[str, ...],
+        url: ProxiedURL,
+        source_header: LooseHeaders,
+        **kwargs: Any,
+    ) -> None:
+        """Fetch the upstream response of a shared request."""
+        error = None
+        try:
+            async with self._upstream(
+                hdrs.METH_GET,
+                url,
+                headers=source_header,
+                **kwargs,
+            ) as result:
+                flight.status = result.status
+                flight.headers = _response_header(result)
+                flight.content_type = result.content_type
+                flight.started.set()
+
+                async for data in result.content.iter_chunked(CHUNK_SIZE):
+                    flight.publish(data)
+                    if flight.size > SHARED_BUFFER_SIZE:
+                        self._release_flight(key, flight)
+                    # Read no further ahead of the slowest waiter
+                    await flight.wait_drained(SHARED_BUFFER_SIZE)
+
+        except aiohttp.ClientError as err:
+            error = err
+        finally:
+            self._release_flight(key, flight)
+            flight.finish(error)
+
+    def _release_flight(self, key: tuple[str, ...], flight: _Flight) -> None:
+        """Stop new requests from joining the shared response."""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        flight.stop_sharing()
+
+
+def flight_key(url: ProxiedURL) -> tuple[str, ...]:
+    """Return the key GET requests of the URL share their fetch under."""
+    return (url.url, str(url.query_params), str(url.headers))
+
+
+def upstream_host(url: ProxiedURL) -> str:
+    """Return the host the metrics of a URL are recorded under."""
+    return URL(url.url).host or ""
+
+
+def body_response(
+    request: web.Request,
+    body: bytes,
+    content_type: str,
+    headers: dict[str, str] | None = None,
+) -> web.Response:
+    """Answer with a body held in memory, or the part a Range asks for."""
+    headers = {hdrs.ACCEPT_RANGES: "bytes", **(headers or {})}
+    if_range = request.headers.get(hdrs.IF_RANGE)
+    if if_range is not None and if_range != headers.get(hdrs.ETAG):
+        # The client's copy is outdated, it needs the whole body
+        return web.Response(
+            body=body, content_type=content_type, headers=headers)
+
+    try:
+        requested = request.http_range
+    except ValueError:
+        # A malformed Range is ignored
+        requested = slice(None, None)
+    if requested.start is None and requested.stop is None:
+        return web.Response(
+            body=body, content_type=content_type, headers=headers)
+
+    start, stop, _ = requested.indices(len(body))
+    if start >= stop:
+        headers[hdrs.CONTENT_RANGE] = f"bytes */{len(body)}"
+        return web.Response(
+            status=HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers=headers
+        )
+    headers[hdrs.CONTENT_RANGE] = f"bytes {start}-{stop - 1}/{len(body)}"
+    return web.Response(
+        status=HTTPStatus.PARTIAL_CONTENT,
+        body=body[start:stop],
+        content_type=content_type,
+        headers=headers
+    )
+
 
 NO_COPY_HEADERS = [
     hdrs.CONTENT_LENGTH,
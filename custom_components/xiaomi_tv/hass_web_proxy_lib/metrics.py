@@ -0,0 +1,117 @@
+"""Counters and histograms of the proxied requests."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any
+
+# Upper bounds in seconds of the upstream latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class _Histogram:
+    """Cumulative histogram in the Prometheus sense."""
+
+    buckets: tuple[float, ...]
+    counts: list[int] = field(default_factory=list)
+    total: float = 0.0
+    count: int = 0
+
+    def __post_init__(self) -> None:
+        """Start with empty buckets."""
+        self.counts = [0] * len(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Record a value."""
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+
+class ProxyMetrics:
+    """Requests, cache efficiency, traffic and upstream health, by host."""
+
+    COUNTERS = ("requests", "cache_hits", "cache_misses", "bytes_sent")
+
+    def __init__(
+        self,
+        prefix: str = "hass_web_proxy",
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        """Initialize the metrics."""
+        self.prefix = prefix
+        self._buckets = buckets
+        self._counters: dict[str, defaultdict[str, int]] = {
+            name: defaultdict(int) for name in self.COUNTERS
+        }
+        self._errors: defaultdict[tuple[str, str], int] = defaultdict(int)
+        self._latency: dict[str, _Histogram] = {}
+
+    def count(self, name: str, host: str, value: int = 1) -> None:
+        """Increase a counter of a host."""
+        self._counters[name][host] += value
+
+    def count_error(self, host: str, error: BaseException) -> None:
+        """Record a failed upstream request, by class of error."""
+        self._errors[(host, type(error).__name__)] += 1
+
+    def observe_latency(self, host: str, seconds: float) -> None:
+        """Record the time an upstream took to answer."""
+        if host not in self._latency:
+            self._latency[host] = _Histogram(self._buckets)
+        self._latency[host].observe(seconds)
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        """Return the metrics of every host."""
+        hosts: defaultdict[str, dict[str, Any]] = defaultdict(
+            lambda: {name: 0 for name in self.COUNTERS} | {"errors": {}}
+        )
+        for name, values in self._counters.items():
+            for host, value in values.items():
+                hosts[host][name] = value
+        for (host, error), value in self._errors.items():
+            hosts[host]["errors"][error] = value
+        for host, histogram in self._latency.items():
+            hosts[host]["upstream_latency"] = {
+                "count": histogram.count,
+                "average": histogram.total / histogram.count,
+                "buckets": dict(zip(histogram.buckets, histogram.counts)),
+            }
+        return dict(hosts)
+
+    def to_prometheus(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, values in self._counters.items():
+            metric = f"{self.prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(
+                f'{metric}{{host="{host}"}} {value}'
+                for host, value in sorted(values.items())
+            )
+
+        metric = f"{self.prefix}_upstream_errors_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.extend(
+            f'{metric}{{host="{host}",error="{error}"}} {value}'
+            for (host, error), value in sorted(self._errors.items())
+        )
+
+        metric = f"{self.prefix}_upstream_latency_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        for host, histogram in sorted(self._latency.items()):
+            for bound, value in zip(histogram.buckets, histogram.counts):
+                lines.append(
+                    f'{metric}_bucket{{host="{host}",le="{bound}"}} {value}'
+                )
+            lines.append(
+                f'{metric}_bucket{{host="{host}",le="+Inf"}} '
+                f"{histogram.count}"
+            )
+            lines.append(f'{metric}_sum{{host="{host}"}} {histogram.total}')
+            lines.append(f'{metric}_count{{host="{host}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,253 @@
+"""Cache of the app icons served by the proxy."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+STORAGE_KEY = f'{DOMAIN}.icons'
+STORAGE_VERSION = 1
+SAVE_DELAY = 30
+
+ICON_DIRECTORY = f'{DOMAIN}_icons'
+
+# Bytes kept on disk and in memory, least recently used icons go first
+DISK_CACHE_SIZE = 32 * 1024 * 1024
+MEMORY_CACHE_SIZE = 4 * 1024 * 1024
+
+# Larger responses are not icons worth caching
+MAX_ICON_SIZE = 1024 * 1024
+
+
+@dataclass
+class CachedIcon:
+    """An icon stored in the cache, named after the hash of its content."""
+
+    digest: str
+    content_type: str
+    size: int
+
+    @property
+    def etag(self) -> str:
+        """Return the entity tag of the icon."""
+        return f'"{self.digest}"'
+
+
+class IconCache:
+    """Content-addressed icon cache with a memory and a disk tier.
+
+    Icons are indexed by their upstream URL and stored once per content on
+    disk, the index is kept in least recently used order and saved in Home
+    Assistant storage.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        disk_size: int = DISK_CACHE_SIZE,
+        memory_size: int = MEMORY_CACHE_SIZE,
+    ) -> None:
+        """Initialize the cache."""
+        self._hass = hass
+        self._directory = hass.config.path('.storage', ICON_DIRECTORY)
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY)
+        self._disk_size = disk_size
+        self._memory_size = memory_size
+        self._index: OrderedDict[str, CachedIcon] = OrderedDict()
+        # URLs pointing to each stored content, and the bytes stored
+        self._references: dict[str, int] = {}
+        self._disk_used = 0
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_used = 0
+        self._load_lock = asyncio.Lock()
+        self._loaded = False
+
+    def _path(self, digest: str) -> str:
+        """Return the file of an icon."""
+        return os.path.join(self._directory, digest)
+
+    async def _async_load(self) -> None:
+        """Load the index on first use.
+
+        Requests arriving meanwhile wait for it, so nothing is stored
+        before the files unknown to the index are cleaned up.
+        """
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            data = await self._store.async_load() or {}
+            icons = [
+                (url, CachedIcon(**icon))
+                for url, icon in data.get('icons', [])
+            ]
+            # Files written after the last save of the index are unknown
+            await self._hass.async_add_executor_job(
+                _remove_unindexed_files, self._directory,
+                {icon.digest for _, icon in icons})
+            for url, icon in icons:
+                self._link(url, icon)
+            self._loaded = True
+
+    def _link(self, url: str, icon: CachedIcon) -> str | None:
+        """Point the URL to the icon, as the most recently used one.
+
+        Returns the digest of the content the URL pointed to, when no URL
+        points to it anymore.
+        """
+        previous = self._index.get(url)
+        self._index[url] = icon
+        self._index.move_to_end(url)
+        self._reference(icon)
+        if previous is None:
+            return None
+        return self._dereference(previous)
+
+    def _unlink(self, url: str) -> str | None:
+        """Forget the URL, returning its digest when left unreferenced."""
+        return self._dereference(self._index.pop(url))
+
+    def _reference(self, icon: CachedIcon) -> None:
+        """Count a URL pointing to the content of the icon."""
+        if icon.digest not in self._references:
+            self._references[icon.digest] = 0
+            self._disk_used += icon.size
+        self._references[icon.digest] += 1
+
+    def _dereference(self, icon: CachedIcon) -> str | None:
+        """Uncount a URL, returning the digest when left unreferenced."""
+        self._references[icon.digest] -= 1
+        if self._references[icon.digest]:
+            return None
+        del self._references[icon.digest]
+        self._disk_used -= icon.size
+        return icon.digest
+
+    async def async_get(self, url: str) -> tuple[CachedIcon, bytes] | None:
+        """Return the cached icon of the URL and its content."""
+        await self._async_load()
+        icon = self._index.get(url)
+        if icon is None:
+            return None
+        self._index.move_to_end(url)
+        self._async_schedule_save()
+
+        body = self._memory.get(icon.digest)
+        if body is not None:
+            self._memory.move_to_end(icon.digest)
+            return icon, body
+
+        try:
+            body = await self._hass.async_add_executor_job(
+                _read_file, self._path(icon.digest))
+        except OSError:
+            self._unlink(url)
+            return None
+        self._remember(icon.digest, body)
+        return icon, body
+
+    async def async_put(
+        self, url: str, content_type: str, body: bytes
+    ) -> CachedIcon:
+        """Store the icon of the URL."""
+        await self._async_load()
+        icon = CachedIcon(
+            digest=hashlib.sha256(body).hexdigest(),
+            content_type=content_type,
+            size=len(body),
+        )
+        if len(body) > MAX_ICON_SIZE:
+            return icon
+
+        await self._hass.async_add_executor_job(
+            _write_file, self._path(icon.digest), body)
+        released = self._link(url, icon)
+        self._remember(icon.digest, body)
+        if released is not None:
+            await self._async_release(released)
+
+        while self._disk_used > self._disk_size and len(self._index) > 1:
+            released = self._unlink(next(iter(self._index)))
+            if released is not None:
+                await self._async_release(released)
+        self._async_schedule_save()
+        return icon
+
+    async def _async_release(self, digest: str) -> None:
+        """Delete the file of an icon no URL points to anymore."""
+        if digest in self._references:
+            # Stored again meanwhile
+            return
+        if digest in self._memory:
+            self._memory_used -= len(self._memory.pop(digest))
+        await self._hass.async_add_executor_job(
+            _remove_file, self._path(digest))
+
+    def _remember(self, digest: str, body: bytes) -> None:
+        """Keep the content of an icon in memory."""
+        if digest in self._memory or len(body) > self._memory_size:
+            return
+        self._memory[digest] = body
+        self._memory_used += len(body)
+        while self._memory_used > self._memory_size:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Save the index once the activity settles."""
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the index in least recently used order."""
+        return {
+            'icons': [[url, asdict(icon)] for url, icon in self._index.items()]
+        }
+
+
+def _read_file(path: str) -> bytes:
+    """Read an icon file."""
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def _write_file(path: str, body: bytes) -> None:
+    """Write an icon file, unless the same content is already stored."""
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(body)
+    os.replace(temporary, path)
+
+
+def _remove_file(path: str) -> None:
+    """Remove an icon file."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_unindexed_files(directory: str, digests: set[str]) -> None:
+    """Remove the icon files missing from the index."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in names:
+        if name not in digests:
+            _remove_file(os.path.join(directory, name))
@@ -0,0 +1,117 @@
+"""Browse and search the apps of a Xiaomi TV."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.media_player import (BrowseError, BrowseMedia,
+                                                   MediaClass, MediaType)
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.network import get_url
+
+from .app_pages import app_pages, page_title, search_apps
+from .apps import AppCatalog, app_icon_url, icon_id
+
+# Icons are shown small, ask the proxy for a matching variant
+THUMBNAIL_SIZE = 256
+THUMBNAIL_FORMAT = 'webp'
+
+ROOT_ID = 'root'
+RECENT_ID = 'recent'
+PAGE_PREFIX = 'page/'
+
+
+def _thumbnail_url(hass: HomeAssistant, item: dict[str, Any]) -> str:
+    """Return the proxied icon URL of an app."""
+    return (
+        f"{get_url(hass)}/api/xiaomi_tv/proxy/"
+        f"?icon={icon_id(app_icon_url(item))}"
+        f"&w={THUMBNAIL_SIZE}&h={THUMBNAIL_SIZE}&format={THUMBNAIL_FORMAT}"
+    )
+
+
+def _app_item(hass: HomeAssistant, item: dict[str, Any]) -> BrowseMedia:
+    """Return the playable media of an app."""
+    return BrowseMedia(
+        title=item['AppName'],
+        media_class=MediaClass.APP,
+        media_content_id=item['PackageName'],
+        media_content_type=MediaType.APP,
+        thumbnail=_thumbnail_url(hass, item),
+        can_play=True,
+        can_expand=False,
+    )
+
+
+def _directory(
+    title: str, media_content_id: str,
+    children: list[BrowseMedia] | None = None
+) -> BrowseMedia:
+    """Return a directory of apps."""
+    return BrowseMedia(
+        title=title,
+        media_class=MediaClass.DIRECTORY,
+        media_content_id=media_content_id,
+        media_content_type=MediaClass.DIRECTORY,
+        can_play=False,
+        can_expand=True,
+        children=children,
+        children_media_class=MediaClass.APP,
+    )
+
+
+async def async_browse_apps(
+    hass: HomeAssistant, catalog: AppCatalog, media_content_id: str | None
+) -> BrowseMedia:
+    """Return one level of the app tree.
+
+    The root lists the recently launched apps and the alphabetical pages of
+    at most PAGE_SIZE apps, or the apps themselves when they fit in one
+    page. Icons are only requested for the level being shown.
+    """
+    pages = app_pages(await catalog.async_get())
+
+    if media_content_id in (None, ROOT_ID):
+        children = []
+        if catalog.recent:
+            children.append(_directory('Recently launched', RECENT_ID))
+        if len(pages) > 1:
+            children.extend(
+                _directory(page_title(page), f'{PAGE_PREFIX}{number}')
+                for number, page in enumerate(pages)
+            )
+        else:
+            children.extend(
+                _app_item(hass, item) for page in pages for item in page)
+        return _directory('Xiaomi TV Media', ROOT_ID, children)
+
+    if media_content_id == RECENT_ID:
+        by_package = {
+            item['PackageName']: item for page in pages for item in page}
+        return _directory('Recently launched', RECENT_ID, [
+            _app_item(hass, by_package[package])
+            for package in catalog.recent
+            if package in by_package
+        ])
+
+    if media_content_id.startswith(PAGE_PREFIX):
+        try:
+            page = pages[int(media_content_id[len(PAGE_PREFIX):])]
+        except (ValueError, IndexError) as error:
+            raise BrowseError(
+                f'Unknown media {media_content_id}') from error
+        return _directory(page_title(page), media_content_id, [
+            _app_item(hass, item) for item in page
+        ])
+
+    raise BrowseError(f'Unknown media {media_content_id}')
+
+
+async def async_search_apps(
+    hass: HomeAssistant, catalog: AppCatalog, search_query: str
+) -> list[BrowseMedia]:
+    """Return the apps whose name or package matches the query."""
+    return [
+        _app_item(hass, item)
+        for item in search_apps(await catalog.async_get(), search_query)
+    ]
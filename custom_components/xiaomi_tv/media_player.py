@@ -1,51 +1,67 @@
 """Add support for the Xiaomi TVs."""
 from __future__ import annotations
 
+import asyncio
+import ipaddress
 import logging
+from functools import partial
 from typing import Any
-from urllib.parse import quote
 
 import aiohttp
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
 from homeassistant.components.media_player import (PLATFORM_SCHEMA,
-                                                   BrowseMedia, MediaClass,
+                                                   BrowseMedia,
                                                    MediaPlayerDeviceClass,
                                                    MediaPlayerEntity,
                                                    MediaPlayerEntityFeature,
-                                                   MediaType)
+                                                   MediaType, SearchMedia,
+                                                   SearchMediaQuery)
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_HOST, CONF_NAME, STATE_OFF, STATE_ON
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.network import get_url
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import pymitv
-from .const import DOMAIN
+from .commands import CommandQueue, Priority, VolumeCoalescer
+from .const import CAST_APP, CONF_NETWORK, DEFAULT_NAME, DOMAIN, SOURCES
+from .coordinator import XiaomiTVCoordinator
+from .discovery import DiscoveryCache
+from .fleet import async_get_coordinator
+from .media_browser import async_browse_apps, async_search_apps
 from .switch import XiaomiTVStatusSwitch
 
-DEFAULT_NAME = 'Xiaomi TV'
+LOGGER = logging.getLogger(__name__)
 
-HTTP_REQUEST_TIMEOUT = 10
 
-LOGGER = logging.getLogger(__name__)
+def valid_network(value: Any) -> str:
+    """Validate a network to discover TVs on, in CIDR notation."""
+    value = cv.string(value)
+    try:
+        ipaddress.ip_network(value, strict=False)
+    except ValueError as error:
+        raise vol.Invalid(f'Invalid network: {value}') from error
+    return value
+
 
 # No host is needed for configuration, however it can be set.
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     {
         vol.Optional(CONF_HOST): cv.string,
         vol.Optional(CONF_NAME, default=DEFAULT_NAME): cv.string,
+        vol.Optional(CONF_NETWORK): valid_network,
     }
 )
 
 
-def setup_platform(
+async def async_setup_platform(
     hass: HomeAssistant,
     config: ConfigType,
-    add_entities: AddEntitiesCallback,
+    async_add_entities: AddEntitiesCallback,
     discovery_info: DiscoveryInfoType | None = None,
 ) -> None:
     """Set up the Xiaomi TV platform."""
@@ -59,24 +75,57 @@ def setup_platform(
         hass.data[DOMAIN][f'{DOMAIN}_{host}'] = {}
     if host is not None:
         # Check if there's a valid TV at the IP address.
-        if not pymitv.Discover().check_ip(host):
+        if not await pymitv.Discover.async_check_ip(
+            async_get_clientsession(hass), host
+        ):
             LOGGER.error(
                 'Could not find Xiaomi TV with specified IP: %s', host)
         else:
             # Register TV with Home Assistant.
             hass.data[DOMAIN][f'{DOMAIN}_{host}'] = {}
-            add_entities([
+            async_add_entities([
                 XiaomiTV(host, name, hass),
                 XiaomiTVStatusSwitch(host, name, hass)
             ])
     else:
-        # Otherwise, discover TVs on network.
-        entities = []
-        for tv in pymitv.Discover().scan():
-            hass.data[DOMAIN][f'{DOMAIN}_{host}'] = {'state': STATE_OFF}
-            entities.append(XiaomiTV(tv, DEFAULT_NAME, hass))
-            entities.append(XiaomiTVStatusSwitch(tv, DEFAULT_NAME, hass))
-        add_entities(entities)
+        # Otherwise, register the cached TVs right away and discover the
+        # network in the background, adding TVs as they answer.
+        cache = DiscoveryCache(hass)
+        cached = await cache.async_load()
+        added = set()
+
+        def _add_tv(tv: str) -> None:
+            if tv in added:
+                return
+            added.add(tv)
+            hass.data[DOMAIN][f'{DOMAIN}_{tv}'] = {'state': STATE_OFF}
+            async_add_entities([
+                XiaomiTV(tv, DEFAULT_NAME, hass),
+                XiaomiTVStatusSwitch(tv, DEFAULT_NAME, hass)
+            ])
+
+        async def _async_refresh() -> None:
+            session = async_get_clientsession(hass)
+            alive = await asyncio.gather(*(
+                pymitv.Discover.async_check_ip(session, tv) for tv in cached
+            ))
+            for tv, is_alive in zip(cached, alive):
+                if is_alive:
+                    cache.async_seen(tv)
+            # A TV missing from its cached address may have moved.
+            if all(alive) and not cache.scan_expired:
+                return
+            async for tv in pymitv.Discover().async_scan(
+                network=config.get(CONF_NETWORK)
+            ):
+                cache.async_seen(tv)
+                _add_tv(tv)
+            cache.async_scanned()
+
+        for tv in cached:
+            _add_tv(tv)
+        hass.async_create_background_task(
+            _async_refresh(), f'{DOMAIN} discovery')
 
 
 async def async_setup_entry(
@@ -88,7 +137,9 @@ async def async_setup_entry(
     return True
 
 
-class XiaomiTV(MediaPlayerEntity, RestoreEntity):
+class XiaomiTV(
+    CoordinatorEntity[XiaomiTVCoordinator], MediaPlayerEntity, RestoreEntity
+):
     """Represent the Xiaomi TV for Home Assistant."""
 
     _attr_supported_features = (
@@ -100,26 +151,28 @@ class XiaomiTV(MediaPlayerEntity, RestoreEntity):
         | MediaPlayerEntityFeature.SELECT_SOURCE
         | MediaPlayerEntityFeature.BROWSE_MEDIA
         | MediaPlayerEntityFeature.PLAY_MEDIA
+        | MediaPlayerEntityFeature.SEARCH_MEDIA
     )
 
     _attr_device_class = MediaPlayerDeviceClass.TV
-    _attr_source_list = ['hdmi1', 'hdmi2', 'cast']
-    _app_list = None
+    _attr_source_list = SOURCES
 
     def __init__(self, ip: str, name: str, hass: HomeAssistant):
         """Receive IP address and name to construct class."""
 
-        # Initialize the Xiaomi TV.
-        self._tv = pymitv.TV(ip)
+        # The Xiaomi TV is shared with the other entities of the device.
+        super().__init__(async_get_coordinator(hass, ip))
+        self._tv = self.coordinator.tv
         # Default name value, only to be overridden by user.
         self._name = name
         self._ip = ip
         self._config_id = f'{DOMAIN}_{self._ip}'
         self._attr_unique_id = f'{self._config_id}_{self.__class__.__name__}'
         self._hass = hass
-        self._session = async_get_clientsession(hass)
         self._volume = 1
         self._max_volume = 1
+        self._commands = CommandQueue(ip)
+        self._volume_coalescer = VolumeCoalescer(self._async_send_volume)
 
     async def async_added_to_hass(self) -> None:
         """Handle entity which will be added to Home Assistant."""
@@ -139,6 +192,14 @@ class XiaomiTV(MediaPlayerEntity, RestoreEntity):
             self._hass.data[DOMAIN].setdefault(
                 self._config_id, {"state": STATE_OFF, "source": "hdmi1"}
             )
+        self._hass.data[DOMAIN][self._config_id].update(
+            {"commands": self._commands})
+        self._commands.start()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Drop the commands still waiting for the TV."""
+        self._volume_coalescer.cancel()
+        await self._commands.async_stop()
 
     @property
     def name(self):
@@ -163,71 +224,43 @@ class XiaomiTV(MediaPlayerEntity, RestoreEntity):
     async def async_select_source(self, source):
         """Select input source."""
         if source == 'cast':
-            await self._hass.async_create_task(
-                self._async_start_app(
-                    'com.xiaomi.mitv.smartshare'
-                )
-            )
+            await self._async_start_app(CAST_APP)
         else:
-            await self._hass.async_add_executor_job(
-                self._tv.change_source, source
-            )
+            await self._async_send(
+                Priority.NAVIGATION,
+                partial(self._tv.change_source, source),
+                ('source', source))
         self._hass.data[DOMAIN][self._config_id].update({'source': source})
 
     @property
     def assumed_state(self):
-        """Indicate that state is assumed."""
-        return True
+        """Indicate that state is polled from the TV."""
+        return False
 
     async def async_browse_media(
         self, media_content_type: str | None = None,
         media_content_id: str | None = None
     ) -> BrowseMedia:
-        """Play media on the TV."""
-        media_list = await self._hass.async_create_task(
-            self._async_get_apps()
-        )
-
-        children = []
-        for item in media_list:
-            sanitized_icon_url = item['IconURL'].replace('\\', '')
-            thumbnail_url = (
-                f"{get_url(self._hass)}/api/xiaomi_tv/proxy/?url="
-                f"{quote(sanitized_icon_url, safe=':/')}"
-            )
-            children.append(
-                BrowseMedia(
-                    title=item['AppName'],
-                    media_class=MediaClass.APP,
-                    media_content_id=item['PackageName'],
-                    media_content_type=MediaType.APP,
-                    thumbnail=thumbnail_url,
-                    can_play=True,
-                    can_expand=False,
-                    children=[]
-                )
-            )
-
-        return BrowseMedia(
-            title='Xiaomi TV Media',
-            media_class='directory',
-            media_content_id='root',
-            media_content_type='directory',
-            can_play=False,
-            can_expand=True,
-            children=children
-        )
+        """Browse the apps installed on the TV."""
+        return await async_browse_apps(
+            self._hass, self.coordinator.apps, media_content_id)
+
+    async def async_search_media(
+        self, query: SearchMediaQuery
+    ) -> SearchMedia:
+        """Search the apps installed on the TV."""
+        return SearchMedia(
+            result=await async_search_apps(
+                self._hass, self.coordinator.apps, query.search_query))
 
     async def async_play_media(
         self, media_type: MediaType | str, media_id: str, **kwargs: Any
     ) -> None:
         """Play media on the TV."""
         if media_type == MediaType.APP:
-            await self._hass.async_create_task(
-                self._async_start_app(media_id)
-            )
+            await self._async_start_app(media_id)
 
-    def turn_off(self):
+    async def async_turn_off(self):
         """
         Instruct the TV to turn sleep.
 
@@ -236,65 +269,58 @@ class XiaomiTV(MediaPlayerEntity, RestoreEntity):
         would be unable to turn the TV back on, unless it's done manually.
         """
         if self.state != STATE_OFF:
-            self._tv.sleep()
+            await self._async_send(
+                Priority.POWER, self._tv.sleep, ('power', 'sleep'))
+            self._tv.probe.expect(False)
 
             self._hass.data[DOMAIN][self._config_id].update({
                 'state': STATE_OFF})
 
-    def turn_on(self):
+    async def async_turn_on(self):
         """Wake the TV back up from sleep."""
         if self.state != STATE_ON:
-            self._tv.wake()
+            await self._async_send(
+                Priority.POWER, self._tv.wake, ('power', 'wake'))
+            self._tv.probe.expect(True)
 
             self._hass.data[DOMAIN][self._config_id].update({
                 'state': STATE_ON})
 
-    async def async_update(self):
-        """Update the TV state and volume."""
-        tv_url = 'http://{}:6095/controller?action=getVolume'.format(
-            self._tv.ip_address)
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Take the volume from the last poll."""
+        data = self.coordinator.data
+        if data and data['volume'] is not None:
+            self._volume = data['volume']
+            self._max_volume = data['max_volume']
+        super()._handle_coordinator_update()
+
+    async def _async_send(self, priority: Priority, factory, key=None):
+        """Queue a command and poll the TV quickly afterwards."""
         try:
-            async with self._session.get(
-                tv_url, timeout=HTTP_REQUEST_TIMEOUT
-            ) as resp:
-                resp.raise_for_status()
-                response = await resp.json(content_type='text/json')
-                self._volume = response['data']['volume']
-                self._max_volume = response['data']['maxVolume']
-        except aiohttp.ClientError as error:
-            LOGGER.warning(error)
+            return await self._commands.async_submit(priority, factory, key)
+        finally:
+            self.coordinator.async_command_sent()
 
     async def _async_start_app(self, package: str) -> None:
         """Start an app on the TV."""
-        tv_url = (
-            f'http://{self._tv.ip_address}:6095/controller'
-            f'?action=startapp&type=packagename&packagename={package}'
-        )
         try:
-            async with self._session.get(
-                tv_url, timeout=HTTP_REQUEST_TIMEOUT
-            ) as resp:
-                resp.raise_for_status()
-        except aiohttp.ClientError as error:
+            started = await self._async_send(
+                Priority.NAVIGATION,
+                partial(self._tv.start_app, package),
+                ('app', package))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
             LOGGER.warning(error)
+            started = False
+        if not started:
+            # The app may be gone, refresh the list on the next browse.
+            self.coordinator.apps.async_invalidate()
+        else:
+            self.coordinator.apps.async_launched(package)
 
     async def _async_get_apps(self) -> list:
         """Get the list of apps installed on the TV."""
-        tv_url = (
-            f'http://{self._tv.ip_address}:6095/controller'
-            '?action=getinstalledapp&count=999&changeIcon=1'
-        )
-        try:
-            async with self._session.get(
-                tv_url, timeout=HTTP_REQUEST_TIMEOUT
-            ) as resp:
-                resp.raise_for_status()
-                response = await resp.json(content_type='text/json')
-                LOGGER.debug(response['data'])
-                return response['data']['AppInfo']
-        except aiohttp.ClientError as error:
-            LOGGER.warning(error)
-            return []
+        return await self.coordinator.apps.async_get()
 
     @property
     def volume_level(self) -> float | None:
@@ -303,26 +329,41 @@ class XiaomiTV(MediaPlayerEntity, RestoreEntity):
 
     async def async_set_volume_level(self, volume: float) -> None:
         """Set the volume level."""
-        diff = volume - self._volume / self._max_volume
-        steps = round(diff * self._max_volume)
-        if steps > 0:
-            for _ in range(steps):
-                await self._hass.async_add_executor_job(self._tv.volume_up)
-        else:
-            for _ in range(-1 * steps):
-                await self._hass.async_add_executor_job(self._tv.volume_down)
+        # Queued too, the request must not land in the middle of a macro
+        if self._tv.max_volume is None \
+                and await self._commands.async_submit(
+                    Priority.VOLUME, self._tv.get_volume, ('get_volume',)
+                ) is False:
+            LOGGER.warning('Could not get volume of %s', self._ip)
+            return
+        self._max_volume = self._tv.max_volume
+
+        # Show the requested volume while the TV catches up
+        self._volume = round(volume * self._max_volume)
+        self.async_write_ha_state()
+        if await self._volume_coalescer.async_set(self._volume):
+            self._volume = self._tv.volume
+
+    async def _async_send_volume(self, volume: int) -> None:
+        """Queue setting the volume of the TV."""
+        await self._async_send(
+            Priority.VOLUME,
+            partial(self._tv.set_volume, volume),
+            ('volume', volume))
 
     async def async_volume_up(self):
         """Increase volume by one."""
-        await self._hass.async_add_executor_job(self._tv.volume_up)
+        await self._async_send(Priority.VOLUME, self._tv.volume_up)
 
     async def async_volume_down(self):
         """Decrease volume by one."""
-        await self._hass.async_add_executor_job(self._tv.volume_down)
+        await self._async_send(
+            Priority.VOLUME, self._tv.volume_down)
 
     async def async_mute_volume(self, mute: bool) -> None:
         """Mute the volume."""
-        self._tv.mute()
+        await self._async_send(
+            Priority.VOLUME, self._tv.mute, 'mute')
 
     @property
     def device_info(self):
@@ -1,9 +1,31 @@
+import asyncio
 import logging
+from collections.abc import Awaitable, Callable, Iterator
+from http import HTTPStatus
+from typing import TypeVar
 
-from .hass_web_proxy_lib import ProxiedURL, ProxyView
+import aiohttp
+from aiohttp import hdrs, web
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant
+
+from .apps import AppCatalog, icon_id
+from .const import DOMAIN
+from .hass_web_proxy_lib import (ProxiedURL, ProxyView, body_response,
+                                 flight_key, upstream_host)
+from .hass_web_proxy_lib.metrics import ProxyMetrics
+from .icon_cache import MAX_ICON_SIZE, CachedIcon, IconCache
+from .thumbnails import Variant, parse_variant, resize
 
 LOGGER = logging.getLogger(__name__)
 
+# Seconds browsers may reuse an icon without asking again
+ICON_MAX_AGE = 24 * 60 * 60
+
+ICON_REQUEST_TIMEOUT = 10
+
+T = TypeVar("T")
+
 
 class MyProxyView(ProxyView):
     """Proxy image to the Xiaomi TV."""
@@ -11,18 +33,182 @@ class MyProxyView(ProxyView):
     url = "/api/xiaomi_tv/proxy/"
     name = "api:xiaomi_tv:proxy"
 
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        websession: aiohttp.ClientSession,
+        icons: IconCache,
+    ) -> None:
+        """Initialize the proxy with its icon cache."""
+        super().__init__(websession)
+        self.metrics = ProxyMetrics("xiaomi_tv_proxy")
+        self._hass = hass
+        self._icons = icons
+        self._pending: dict[str, asyncio.Task] = {}
+
     def _get_proxied_url(self, request):
-        """Get the proxied URL."""
-        target_url = request.query.get("url")
-        if not target_url:
-            LOGGER.error("No target URL provided")
-            return None
+        """Get the proxied URL of an icon listed by one of the TVs.
+
+        Icons are asked by their id, the URL itself is only accepted when it
+        belongs to a listed icon, so the proxy can't reach other hosts.
+        """
+        icon = request.query.get("icon")
+        if not icon:
+            target_url = request.query.get("url")
+            if not target_url:
+                LOGGER.error("No icon provided")
+                return None
+            icon = icon_id(target_url)
+
+        for catalog in self._catalogs():
+            target_url = catalog.resolve_icon(icon)
+            if target_url:
+                return ProxiedURL(
+                  target_url,
+                  headers={},
+                  allow_unauthenticated=True
+                )
+        LOGGER.debug("Unknown icon %s", icon)
+        return None
+
+    def _catalogs(self) -> Iterator[AppCatalog]:
+        """Return the app lists of the TVs."""
+        for data in self._hass.data.get(DOMAIN, {}).values():
+            if isinstance(data, dict) and "coordinator" in data:
+                yield data["coordinator"].apps
+
+    async def _handle_request(self, request, **kwargs):
+        """Serve the icon from the cache, fetching it on a miss."""
+        url_or_response = self._get_proxied_url_or_handle_error(
+            request,
+            **kwargs
+        )
+        if isinstance(url_or_response, web.Response):
+            return url_or_response
+        url = url_or_response.url
+        host = upstream_host(url_or_response)
+        self.metrics.count("requests", host)
+
         try:
-            return ProxiedURL(
-              target_url,
-              headers={},
-              allow_unauthenticated=True
-            )
-        except Exception as e:
-            LOGGER.error(f"Failed to create proxied URL: {e}")
-            return None
+            variant = parse_variant(request.query)
+        except ValueError:
+            return web.Response(status=HTTPStatus.BAD_REQUEST)
+        if variant is not None:
+            cached = await self._icons.async_get(variant.key(url))
+            if cached is not None:
+                self.metrics.count("cache_hits", host)
+                return self._icon_response(request, host, *cached)
+
+        cached = await self._icons.async_get(url)
+        if cached is not None:
+            self.metrics.count("cache_hits", host)
+        else:
+            self.metrics.count("cache_misses", host)
+            fetched = await self._fetch_icon(request, url_or_response)
+            if isinstance(fetched, web.StreamResponse):
+                return fetched
+            cached = fetched
+
+        if variant is not None:
+            cached = await self._shared(
+                variant.key(url),
+                lambda: self._create_variant(url, variant, *cached))
+        return self._icon_response(request, host, *cached)
+
+    async def _shared(self, key: str, create: Callable[[], Awaitable[T]]) -> T:
+        """Run the work once for all the requests needing it at once."""
+        task = self._pending.get(key)
+        if task is None:
+            task = self._pending[key] = asyncio.create_task(create())
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        # A client going away must not cancel the work of the others
+        return await asyncio.shield(task)
+
+    async def _create_variant(
+        self, url: str, variant: Variant, icon: CachedIcon, body: bytes
+    ) -> tuple[CachedIcon, bytes]:
+        """Resize the icon and store the result."""
+        resized = await self._hass.async_add_executor_job(
+            resize, body, variant)
+        if resized is None:
+            # Remember the original so the next request doesn't try again
+            return await self._icons.async_put(
+                variant.key(url), icon.content_type, body), body
+        return await self._icons.async_put(
+            variant.key(url), variant.content_type, resized), resized
+
+    async def _fetch_icon(
+        self, request: web.Request, url: ProxiedURL
+    ) -> tuple[CachedIcon, bytes] | web.StreamResponse:
+        """Fetch the icon from the TV and store it.
+
+        The fetch is shared with the identical requests in flight. A response
+        that isn't an icon, by its status or its size, is returned as the
+        response to the client instead, the large one streamed from the same
+        fetch without caching.
+        """
+        key = flight_key(url)
+        flight, reader = self._join_flight(
+            key,
+            url,
+            url.headers,
+            timeout=aiohttp.ClientTimeout(
+                sock_connect=ICON_REQUEST_TIMEOUT,
+                sock_read=ICON_REQUEST_TIMEOUT,
+            ),
+        )
+        try:
+            await flight.started.wait()
+            if flight.error is not None:
+                raise flight.error
+            if flight.status != HTTPStatus.OK:
+                return web.Response(status=flight.status)
+            body = bytearray()
+            async for chunk in flight.iter_chunks(reader):
+                body.extend(chunk)
+                if len(body) > MAX_ICON_SIZE:
+                    return await self._stream_flight(
+                        request, url, flight, reader, bytes(body))
+        finally:
+            self._leave_flight(key, flight, reader)
+        content = bytes(body)
+        icon = await self._shared(
+            url.url,
+            lambda: self._icons.async_put(
+                url.url, flight.content_type, content))
+        return icon, content
+
+    def _icon_response(
+        self, request: web.Request, host: str, icon: CachedIcon, body: bytes
+    ) -> web.Response:
+        """Answer with the icon, or tell the client its copy is current."""
+        headers = {
+            hdrs.ETAG: icon.etag,
+            hdrs.CACHE_CONTROL: f"public, max-age={ICON_MAX_AGE}",
+        }
+        if icon.etag in request.headers.get(hdrs.IF_NONE_MATCH, ""):
+            return web.Response(
+                status=HTTPStatus.NOT_MODIFIED, headers=headers)
+        response = body_response(request, body, icon.content_type, headers)
+        self.metrics.count("bytes_sent", host, len(response.body))
+        return response
+
+
+class ProxyMetricsView(HomeAssistantView):
+    """Serve the metrics of the proxy in the Prometheus text format."""
+
+    url = "/api/xiaomi_tv/proxy/metrics"
+    name = "api:xiaomi_tv:proxy:metrics"
+    requires_auth = True
+
+    def __init__(self, metrics: ProxyMetrics) -> None:
+        """Initialize the view."""
+        self._metrics = metrics
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the metrics."""
+        return web.Response(
+            text=self._metrics.to_prometheus(),
+            content_type="text/plain",
+            headers={hdrs.CACHE_CONTROL: "no-store"},
+        )
@@ -4,9 +4,17 @@ that can connect to Xiaomi TVs, and control them.
 """
 
 
+from .announcer import FakeAnnouncer  # noqa: F401
+from .async_control import AsyncControl  # noqa: F401
+from .async_tv import AsyncTV  # noqa: F401
 from .control import Control  # noqa: F401
 from .discover import Discover  # noqa: F401
-from .navigator import Navigator  # noqa: F401
+from .liveness import LivenessProbe  # noqa: F401
+from .navigator import MenuLayout, Navigator  # noqa: F401
+from .simulator import SimulatedTV  # noqa: F401
 from .tv import TV  # noqa: F401
 
-__all__ = ["Control", "Discover", "Navigator", "TV"]
+__all__ = [
+    "AsyncControl", "AsyncTV", "Control", "Discover", "FakeAnnouncer",
+    "LivenessProbe", "MenuLayout", "Navigator", "SimulatedTV", "TV"
+]
@@ -0,0 +1,176 @@
+"""
+The pymitv.FakeAnnouncer module announces a fake TV over SSDP, so discovery
+can be exercised without a real TV on the network.
+"""
+import asyncio
+import socket
+import struct
+import uuid
+
+from aiohttp import web
+
+SSDP_ADDRESS = '239.255.255.250'
+SSDP_PORT = 1900
+DEVICE_TYPE = 'urn:schemas-upnp-org:device:MediaRenderer:1'
+
+ANNOUNCE_INTERVAL = 30
+MAX_AGE = 1800
+
+DESCRIPTION = """<?xml version="1.0"?>
+<root xmlns="urn:schemas-upnp-org:device-1-0">
+  <specVersion><major>1</major><minor>0</minor></specVersion>
+  <device>
+    <deviceType>{device_type}</deviceType>
+    <friendlyName>{name}</friendlyName>
+    <manufacturer>Xiaomi</manufacturer>
+    <modelName>MiTV</modelName>
+    <UDN>uuid:{udn}</UDN>
+  </device>
+</root>
+"""
+
+
+class _SSDPProtocol(asyncio.DatagramProtocol):
+    """Answers the M-SEARCH requests looking for the fake TV."""
+
+    def __init__(self, announcer):
+        self.announcer = announcer
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        message = data.decode(errors='ignore')
+        if not message.startswith('M-SEARCH'):
+            return
+        targets = ('ssdp:all', 'upnp:rootdevice', DEVICE_TYPE)
+        if any(target in message for target in targets):
+            self.transport.sendto(self.announcer.search_response(), addr)
+
+
+class FakeAnnouncer:
+    """Pretends to be a TV by answering and sending SSDP announcements.
+
+    The description document and the isalive request of the controller are
+    served on the given port, so the announced TV passes discovery checks.
+    """
+
+    def __init__(self, ip_address, name='Xiaomi TV', port=6095,
+                 interval=ANNOUNCE_INTERVAL):
+        self.ip_address = ip_address
+        self.name = name
+        self.port = port
+        self.interval = interval
+        self.udn = str(uuid.uuid4())
+        self._runner = None
+        self._transport = None
+        self._task = None
+
+    @property
+    def location(self):
+        """Returns the URL of the description document."""
+        return 'http://{}:{}/description.xml'.format(
+            self.ip_address, self.port
+        )
+
+    def _message(self, start_line, headers):
+        lines = [start_line] + [
+            '{}: {}'.format(key, value) for key, value in headers.items()
+        ]
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode()
+
+    def notify(self, alive=True):
+        """Returns a NOTIFY message announcing or revoking the TV."""
+        return self._message('NOTIFY * HTTP/1.1', {
+            'HOST': '{}:{}'.format(SSDP_ADDRESS, SSDP_PORT),
+            'CACHE-CONTROL': 'max-age={}'.format(MAX_AGE),
+            'LOCATION': self.location,
+            'NT': DEVICE_TYPE,
+            'NTS': 'ssdp:alive' if alive else 'ssdp:byebye',
+            'SERVER': 'Linux UPnP/1.0 pymitv',
+            'USN': 'uuid:{}::{}'.format(self.udn, DEVICE_TYPE),
+        })
+
+    def search_response(self):
+        """Returns the answer to an M-SEARCH request."""
+        return self._message('HTTP/1.1 200 OK', {
+            'CACHE-CONTROL': 'max-age={}'.format(MAX_AGE),
+            'EXT': '',
+            'LOCATION': self.location,
+            'SERVER': 'Linux UPnP/1.0 pymitv',
+            'ST': DEVICE_TYPE,
+            'USN': 'uuid:{}::{}'.format(self.udn, DEVICE_TYPE),
+        })
+
+    async def _description(self, request):
+        return web.Response(
+            text=DESCRIPTION.format(
+                device_type=DEVICE_TYPE, name=self.name, udn=self.udn
+            ),
+            content_type='text/xml',
+        )
+
+    async def _isalive(self, request):
+        return web.json_response({'status': 0, 'msg': 'success'})
+
+    def _socket(self):
+        sock = socket.socket(
+            socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP
+        )
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, 'SO_REUSEPORT'):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(('', SSDP_PORT))
+        sock.setsockopt(
+            socket.IPPROTO_IP,
+            socket.IP_ADD_MEMBERSHIP,
+            struct.pack(
+                '4sl', socket.inet_aton(SSDP_ADDRESS), socket.INADDR_ANY
+            ),
+        )
+        sock.setsockopt(
+            socket.IPPROTO_IP,
+            socket.IP_MULTICAST_IF,
+            socket.inet_aton(self.ip_address),
+        )
+        sock.setblocking(False)
+        return sock
+
+    async def _announce(self):
+        while True:
+            self._transport.sendto(
+                self.notify(), (SSDP_ADDRESS, SSDP_PORT)
+            )
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        """Starts serving the TV and announcing it."""
+        app = web.Application()
+        app.router.add_get('/description.xml', self._description)
+        app.router.add_get('/request', self._isalive)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.ip_address, self.port).start()
+
+        self._transport, _ = (
+            await asyncio.get_running_loop().create_datagram_endpoint(
+                lambda: _SSDPProtocol(self), sock=self._socket()
+            )
+        )
+        self._task = asyncio.create_task(self._announce())
+
+    async def stop(self):
+        """Revokes the announcement and stops serving the TV."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._transport is not None:
+            self._transport.sendto(
+                self.notify(alive=False), (SSDP_ADDRESS, SSDP_PORT)
+            )
+            self._transport.close()
+            self._transport = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
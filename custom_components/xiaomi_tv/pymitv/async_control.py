@@ -0,0 +1,222 @@
+"""
+The pymitv.AsyncControl module is the asyncio counterpart of pymitv.Control.
+"""
+import asyncio
+import json
+
+import aiohttp
+
+from .control import Control
+
+# Seconds waited for a 'wait' token of a macro
+WAIT_DELAY = 0.7
+
+# Seconds waited between two consecutive keys
+KEY_DELAY = 0
+
+# Seconds between two keys of a batch, the next key otherwise leaves as
+# soon as one in flight is answered; raise it for TVs dropping fast keys
+KEY_GAP = 0
+
+# Keys of a batch in flight at once, one per keep-alive connection a TV
+# serves well
+BATCH_WINDOW = 4
+
+# Port of the controller of the TV
+PORT = 6095
+
+# Volume range of the TVs that don't report theirs
+MAX_VOLUME = 100
+
+REQUEST_TIMEOUT = 10
+
+STATE_TIMEOUT = 1
+
+
+class AsyncControl:
+    """A virtual remote control for the TV that runs on the event loop."""
+
+    def __init__(self, session: aiohttp.ClientSession,
+                 wait_delay=WAIT_DELAY, key_delay=KEY_DELAY, key_gap=KEY_GAP,
+                 port=PORT, batch_window=BATCH_WINDOW):
+        self.session = session
+        self.port = port
+
+        # Delays are tunable, slower TVs drop keys that come too fast
+        self.wait_delay = wait_delay
+        self.key_delay = key_delay
+        self.key_gap = key_gap
+        self.batch_window = batch_window
+
+    async def _request(self, url, timeout=REQUEST_TIMEOUT):
+        """Perform a GET request and return the status and the body."""
+        async with self.session.get(
+            url, timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as response:
+            return response.status, await response.read()
+
+    async def _request_json(self, url, timeout=REQUEST_TIMEOUT):
+        """Perform a GET request and decode the JSON body."""
+        async with self.session.get(
+            url, timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def send_keystrokes(self, ip_address, keystrokes, wait=False):
+        """Connects to TV and sends keystroke via HTTP."""
+        tv_url = (
+            "http://{}:{}/controller?action=keyevent&keycode=".format(
+                ip_address, self.port
+            )
+        )
+
+        sent = False
+        for keystroke in keystrokes:
+            if keystroke == 'wait' or wait is True:
+                await asyncio.sleep(self.wait_delay)
+            elif sent and self.key_delay:
+                await asyncio.sleep(self.key_delay)
+            if keystroke == 'wait':
+                continue
+
+            status, _ = await self._request(tv_url + keystroke)
+            sent = True
+
+            if status != 200:
+                return False
+
+        return True
+
+    async def change_source(self, ip_address, source):
+        """Select source hdmi1 or hdmi2"""
+        tv_url = (
+            "http://{}:{}/controller?action=changesource&source=".format(
+                ip_address, self.port
+            )
+        )
+        status, _ = await self._request(tv_url + source)
+
+        return status == 200
+
+    async def send_keystroke_batch(self, ip_address, keystrokes, gap=None):
+        """Sends keystrokes without waiting for the reply of each one.
+
+        Up to batch_window keys are in flight at once over the keep-alive
+        connections of the session, the next one leaves as soon as one is
+        answered, or gap seconds after the previous one when larger. A
+        'wait' token lets the keys before it complete first. Meant for keys
+        whose order doesn't matter, like volume steps. Returns a
+        (keystroke, success) pair per key sent.
+        """
+        tv_url = (
+            "http://{}:{}/controller?action=keyevent&keycode=".format(
+                ip_address, self.port
+            )
+        )
+        gap = self.key_gap if gap is None else gap
+        window = asyncio.Semaphore(self.batch_window)
+
+        async def send_key(keystroke):
+            async with window:
+                return await self._send_key(tv_url, keystroke)
+
+        results = []
+        pending = []
+        try:
+            for keystroke in keystrokes:
+                if keystroke == 'wait':
+                    results.extend(await asyncio.gather(*pending))
+                    pending = []
+                    await asyncio.sleep(self.wait_delay)
+                    continue
+                if pending and gap:
+                    await asyncio.sleep(gap)
+                pending.append(asyncio.ensure_future(send_key(keystroke)))
+            results.extend(await asyncio.gather(*pending))
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return results
+
+    async def _send_key(self, tv_url, keystroke):
+        """Sends one key of a batch, failures included in the result."""
+        try:
+            status, _ = await self._request(tv_url + keystroke)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return keystroke, False
+        return keystroke, status == 200
+
+    async def mute(self, ip_address):
+        """Polyfill for muting the TV."""
+        results = await self.send_keystroke_batch(
+            ip_address, Control.volume_down * 30
+        )
+        return all(success for _, success in results)
+
+    async def check_state(self, ip_address):
+        """Check if xiaomi tv is reachable"""
+        tv_url = "http://{}:{}/request?action=isalive".format(
+            ip_address, self.port
+        )
+
+        try:
+            await self._request(tv_url, timeout=STATE_TIMEOUT)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            return False
+
+        return True
+
+    async def get_volume(self, ip_address, timeout=REQUEST_TIMEOUT):
+        """Get the current and the maximum volume of xiaomi tv"""
+        tv_url = "http://{}:{}/controller?action=getVolume".format(
+            ip_address, self.port
+        )
+
+        try:
+            response = await self._request_json(tv_url, timeout)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            return False
+
+        data = response['data']
+        if isinstance(data, str):
+            # Some firmwares encode the data as JSON, and name it volum
+            data = json.loads(data)
+        return {
+            'volume': data.get('volume', data.get('volum')),
+            'maxVolume': data.get('maxVolume', MAX_VOLUME),
+        }
+
+    async def set_volume(self, ip_address, volume):
+        """Set the absolute volume, on TVs that support it"""
+        tv_url = "http://{}:{}/general?action=setVolum&volum={}".format(
+            ip_address, self.port, volume
+        )
+        status, _ = await self._request(tv_url)
+
+        return status == 200
+
+    async def start_app(self, ip_address, package):
+        """Start an app by its package name."""
+        tv_url = (
+            "http://{}:{}/controller"
+            "?action=startapp&type=packagename&packagename={}".format(
+                ip_address, self.port, package
+            )
+        )
+        status, _ = await self._request(tv_url)
+
+        return status == 200
+
+    async def get_installed_apps(self, ip_address):
+        """Get the list of apps installed on the TV."""
+        tv_url = (
+            "http://{}:{}/controller"
+            "?action=getinstalledapp&count=999&changeIcon=1".format(
+                ip_address, self.port
+            )
+        )
+        response = await self._request_json(tv_url)
+
+        return response['data']['AppInfo']
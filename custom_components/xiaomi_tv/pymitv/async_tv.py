@@ -0,0 +1,193 @@
+"""Contains the asyncio class for interfacing with the TV."""
+import asyncio
+
+import aiohttp
+
+from .async_control import (KEY_DELAY, KEY_GAP, PORT, REQUEST_TIMEOUT,
+                            WAIT_DELAY, AsyncControl)
+from .control import Control
+from .liveness import LivenessProbe
+from .navigator import DEFAULT_MODEL, Navigator
+
+
+class AsyncTV:
+    """An asyncio representation of the TV that stores state and controls."""
+    ip_address = None
+    state = True
+    source = None
+
+    def __init__(
+        self,
+        ip_address,
+        session: aiohttp.ClientSession,
+        source=None,
+        assume_state=True,
+        wait_delay=WAIT_DELAY,
+        key_delay=KEY_DELAY,
+        key_gap=KEY_GAP,
+        model=DEFAULT_MODEL,
+        port=PORT,
+    ):
+        self.ip_address = ip_address
+        self.source = source
+        # Selects the sources menu layout the routes are planned on
+        self.model = model
+        self.assume_state = assume_state
+        self.control = AsyncControl(
+            session, wait_delay, key_delay, key_gap, port
+        )
+        self.probe = LivenessProbe(self.control, ip_address)
+        self.volume = None
+        self.max_volume = None
+
+        # Whether the TV accepts absolute volumes, unknown until tried
+        self.supports_set_volume = None
+
+    async def _send_keystroke(self, keystroke, wait=False):
+        return await self.control.send_keystrokes(
+            self.ip_address, keystroke, wait
+        )
+
+    async def change_source(self, source):
+        """Change source of xiaomi tv"""
+        self.source = source
+        return await self.control.change_source(self.ip_address, source)
+
+    async def get_volume(self, timeout=REQUEST_TIMEOUT):
+        """Get volume of xiaomi tv"""
+        data = await self.control.get_volume(self.ip_address, timeout)
+        if data is False:
+            return False
+
+        self.volume = data['volume']
+        self.max_volume = data['maxVolume']
+
+        return self.volume
+
+    async def set_volume(self, volume):
+        """Sets the volume, stepping to it when it can't be set directly."""
+        if self.supports_set_volume:
+            if not await self.control.set_volume(self.ip_address, volume):
+                return False
+            self.volume = volume
+            return True
+
+        if self.supports_set_volume is None:
+            # Only the first try is confirmed, to learn whether it works. A
+            # TV ignoring the request would pass for one taking it if the
+            # volume were already right, so nothing is learnt from that.
+            before = await self.get_volume()
+            if before is False:
+                return False
+            if before == volume:
+                return True
+            if await self.control.set_volume(self.ip_address, volume):
+                current = await self.get_volume()
+                if current is False:
+                    return False
+                if current == volume:
+                    self.supports_set_volume = True
+                    return True
+            self.supports_set_volume = False
+
+        if self.volume is None and await self.get_volume() is False:
+            return False
+
+        direction = 1 if volume > self.volume else -1
+        keystroke = Control.volume_up if direction > 0 else Control.volume_down
+        try:
+            results = await self.control.send_keystroke_batch(
+                self.ip_address, keystroke * abs(volume - self.volume)
+            )
+        except asyncio.CancelledError:
+            # Unknown how many steps landed, read it again next time
+            self.volume = None
+            raise
+
+        # Count the steps taken, so a failed sequence leaves a known volume
+        self.volume += direction * sum(success for _, success in results)
+        if not all(success for _, success in results):
+            return False
+
+        return await self.get_volume() == volume
+
+    async def is_on(self):
+        """Returns the assumed or the actual state of the TV."""
+        if self.assume_state:
+            return self.state
+        return await self.probe.check()
+
+    async def start_app(self, package):
+        """Starts an app by its package name."""
+        return await self.control.start_app(self.ip_address, package)
+
+    async def get_installed_apps(self):
+        """Returns the apps installed on the TV."""
+        return await self.control.get_installed_apps(self.ip_address)
+
+    async def wake(self):
+        """Wakes up the TV from sleep."""
+        return await self._send_keystroke(Control.wake)
+
+    async def sleep(self):
+        """Puts the TV to sleep."""
+        return await self._send_keystroke(Control.sleep)
+
+    async def turn_off(self):
+        """Turns off the TV completely."""
+        return await self._send_keystroke(Control.turn_off)
+
+    async def enter(self):
+        """Presses enter to affirm."""
+        return await self._send_keystroke(Control.enter)
+
+    async def menu(self):
+        """Opens the menu."""
+        return await self._send_keystroke(Control.menu)
+
+    async def home(self):
+        """Goes home."""
+        return await self._send_keystroke(Control.home)
+
+    async def back(self):
+        """Goes back."""
+        return await self._send_keystroke(Control.back)
+
+    async def up(self):
+        """Presses up key."""
+        return await self._send_keystroke(Control.up)
+
+    async def down(self):
+        """Presses down key."""
+        return await self._send_keystroke(Control.down)
+
+    async def left(self):
+        """Presses left key."""
+        return await self._send_keystroke(Control.left)
+
+    async def right(self):
+        """Presses right key."""
+        return await self._send_keystroke(Control.right)
+
+    async def volume_up(self):
+        """Turns up the volume by one."""
+        return await self._send_keystroke(Control.volume_up)
+
+    async def volume_down(self):
+        """Turns down the volume by one."""
+        return await self._send_keystroke(Control.volume_down)
+
+    async def mute(self):
+        """Mutes the TV."""
+        return await self.control.mute(self.ip_address)
+
+    async def set_source(self, source):
+        """Selects and saves source."""
+        route = Navigator(
+            source=self.source, model=self.model
+        ).navigate_to_source(source)
+
+        # Save new source
+        self.source = source
+
+        return await self._send_keystroke(route)
@@ -1,19 +1,40 @@
 """
 The pymitv.Discover module is in charge of discovering local TVs.
 """
+import asyncio
+import ipaddress
 import socket
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import aiohttp
 import requests
 
+# Number of hosts probed at the same time
+SCAN_CONCURRENCY = 256
+
+REQUEST_TIMEOUT = 1
+
+PORT = 6095
+
 
 class Discover:
     """This class handles discovery and checking of local Xiaomi TVs."""
     def __init__(self):
         pass
 
-    def scan(self, stop_on_first=True, base_ip=0):
-        """Scans the local network for TVs."""
-        tvs = []
+    @staticmethod
+    def hosts(network=None, base_ip=0):
+        """Returns the addresses to scan.
+
+        The network is given in CIDR notation (e.g. 192.168.0.0/22). The
+        legacy base_ip (e.g. 192.168.1) expands to the hosts 2-255 of it. When
+        neither is passed the /24 of the local address is used.
+        """
+        if network is not None:
+            return [
+                str(host)
+                for host in ipaddress.ip_network(network, strict=False).hosts()
+            ]
 
         # Check if base_ip has been passed
         if base_ip == 0:
@@ -27,35 +48,112 @@ class Discover:
             ip_parts = ip_address.split('.')
             base_ip = ip_parts[0] + '.' + ip_parts[1] + '.' + ip_parts[2]
 
-        # Loop through every IP and check if TV is alive
-        for ip_suffix in range(2, 256):
-            ip_check = '{}.{}'.format(base_ip, ip_suffix)
+        return ['{}.{}'.format(base_ip, suffix) for suffix in range(2, 256)]
 
-            if self.check_ip(ip_check):
-                tvs.append(ip_check)
+    def iter_scan(self, base_ip=0, network=None,
+                  concurrency=SCAN_CONCURRENCY, timeout=REQUEST_TIMEOUT):
+        """Scans the network in a thread pool, yielding TVs as found."""
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            futures = {
+                executor.submit(
+                    self.check_ip, ip_check, timeout=timeout
+                ): ip_check
+                for ip_check in self.hosts(network, base_ip)
+            }
+            for future in as_completed(futures):
+                if future.result():
+                    yield futures[future]
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def scan(self, stop_on_first=True, base_ip=0, network=None,
+             concurrency=SCAN_CONCURRENCY, timeout=REQUEST_TIMEOUT):
+        """Scans the local network for TVs."""
+        tvs = []
+
+        for ip_check in self.iter_scan(base_ip, network, concurrency, timeout):
+            tvs.append(ip_check)
 
-                if stop_on_first:
-                    break
+            if stop_on_first:
+                break
 
         return tvs
 
+    async def async_scan(self, session=None, network=None, base_ip=0,
+                         concurrency=SCAN_CONCURRENCY,
+                         timeout=REQUEST_TIMEOUT, port=PORT):
+        """Scans the network on the event loop, yielding TVs as found.
+
+        Without a session a temporary one sized for the concurrency is used.
+        """
+        hosts = iter(await asyncio.get_running_loop().run_in_executor(
+            None, self.hosts, network, base_ip
+        ))
+        own_session = session is None
+        if own_session:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=concurrency)
+            )
+        found = asyncio.Queue()
+
+        async def worker():
+            for ip_check in hosts:
+                if await self.async_check_ip(
+                    session, ip_check, timeout, port
+                ):
+                    found.put_nowait(ip_check)
+
+        async def run():
+            try:
+                await asyncio.gather(
+                    *(worker() for _ in range(concurrency))
+                )
+            finally:
+                found.put_nowait(None)
+
+        runner = asyncio.create_task(run())
+        try:
+            while (ip_check := await found.get()) is not None:
+                yield ip_check
+            await runner
+        finally:
+            runner.cancel()
+            if own_session:
+                await session.close()
+
     @staticmethod
-    def check_ip(ip_address, log=False):
+    def check_ip(ip_address, log=False, timeout=REQUEST_TIMEOUT):
         """Attempts a connection to the TV and checks if there is a TV."""
         if log:
             print('Checking ip: {}...'.format(ip_address))
 
-        request_timeout = 1
-
         try:
             tv_url = "http://{}:6095/request?action=isalive".format(
                 ip_address
             )
-            request = requests.get(tv_url, timeout=request_timeout)
+            request = requests.get(tv_url, timeout=timeout)
         except (
             requests.exceptions.ConnectTimeout,
             requests.exceptions.ConnectionError,
+            requests.exceptions.ReadTimeout,
         ):
             return False
 
         return request.status_code == 200
+
+    @staticmethod
+    async def async_check_ip(session, ip_address, timeout=REQUEST_TIMEOUT,
+                             port=PORT):
+        """Attempts a connection to the TV and checks if there is a TV."""
+        tv_url = "http://{}:{}/request?action=isalive".format(
+            ip_address, port
+        )
+
+        try:
+            async with session.get(
+                tv_url, timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                return response.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
@@ -0,0 +1,70 @@
+"""
+The pymitv.LivenessProbe module tells whether the TV is actually on.
+"""
+import time
+
+# Consecutive answers needed to consider the TV on, and misses to consider
+# it off, so a single lost request doesn't flip the state
+RISE = 1
+FALL = 2
+
+# Seconds a check result is reused before asking the TV again
+MAX_AGE = 5
+
+# Seconds an expected state wins over contrary observations, a TV going
+# to sleep keeps answering for a moment
+HOLD = 10
+
+
+class LivenessProbe:
+    """Debounced reachability of the TV, built on the isalive request."""
+
+    def __init__(self, control, ip_address, rise=RISE, fall=FALL,
+                 max_age=MAX_AGE):
+        self.control = control
+        self.ip_address = ip_address
+        self.rise = rise
+        self.fall = fall
+        self.max_age = max_age
+
+        # None until the TV has been observed
+        self.is_on = None
+
+        self._successes = 0
+        self._failures = 0
+        self._observed = 0
+        self._hold_until = 0
+
+    async def check(self):
+        """Returns whether the TV is on, asking it when the result is old."""
+        if self.is_on is None or \
+                time.monotonic() - self._observed >= self.max_age:
+            self.record(await self.control.check_state(self.ip_address))
+        return self.is_on
+
+    def record(self, alive):
+        """Records the outcome of any request sent to the TV."""
+        now = time.monotonic()
+        self._observed = now
+        if alive:
+            self._successes += 1
+            self._failures = 0
+        else:
+            self._failures += 1
+            self._successes = 0
+
+        if now < self._hold_until and alive != self.is_on:
+            return
+        if self.is_on is None:
+            self.is_on = alive
+        elif alive and self._successes >= self.rise:
+            self.is_on = True
+        elif not alive and self._failures >= self.fall:
+            self.is_on = False
+
+    def expect(self, is_on, hold=HOLD):
+        """Assumes a state after a power command, for the hold period."""
+        self.is_on = is_on
+        self._successes = 0
+        self._failures = 0
+        self._hold_until = time.monotonic() + hold
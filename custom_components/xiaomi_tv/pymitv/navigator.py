@@ -1,44 +1,119 @@
 """
-The pymitv.Discover module is in charge of calculating navigation routes on the
-TV.
+The pymitv.Navigator module is in charge of calculating navigation routes on
+the TV.
 """
-
-
-class Navigator():
-
-    # Keystroke sequence to open sources menu
-    OPEN_SOURCES_IF_NONE = [
-        'enter'
-    ]
-
-    OPEN_SOURCES_IF_SOURCE_ACTIVE = [
-        'home',
-        'enter'
-    ]
-
-    SOURCE_PATH = {
-        'hdmi1': ['enter'],
-        'hdmi2': ['right', 'enter'],
-        'hdmi3': ['right', 'right', 'enter'],
-        'gallery': ['right', 'right', 'right', 'enter'],
-        'aux': ['right', 'right', 'right', 'right', 'enter'],
-        'tv': ['down', 'enter'],
-        'vga': ['down', 'right', 'enter'],
-        'av': ['down', 'right', 'right', 'enter'],
-        'dtmb': ['down', 'right', 'right', 'right', 'enter'],
-    }
-
-    def __init__(self, source=None):
-        self.source = source
-
-    def navigate_to_source(self, source):
-        keystrokes = []
-
-        if self.source is None:
-            keystrokes = keystrokes + self.OPEN_SOURCES_IF_NONE
-        else:
-            keystrokes = keystrokes + self.OPEN_SOURCES_IF_SOURCE_ACTIVE
-
-        keystrokes = keystrokes + self.SOURCE_PATH[source]
-
-        return keystrokes
+from collections import deque
+
+DEFAULT_MODEL = 'default'
+
+# Arrow keys and the move of the cursor they cause in the grid
+MOVES = (
+    ('down', 1, 0),
+    ('up', -1, 0),
+    ('right', 0, 1),
+    ('left', 0, -1),
+)
+
+
+class MenuLayout:
+    """The sources menu of a TV model, as rows of tiles."""
+
+    def __init__(self, rows, cursor_on_active=False):
+        self.rows = rows
+        # Whether the menu opens with the cursor on the active source
+        # instead of the first tile
+        self.cursor_on_active = cursor_on_active
+
+        self.positions = {
+            source: (row, column)
+            for row, sources in enumerate(rows)
+            for column, source in enumerate(sources)
+        }
+
+    @property
+    def origin(self):
+        """Returns the tile the cursor starts on."""
+        return self.rows[0][0]
+
+    def neighbours(self, source):
+        """Yields the arrow keys usable on a tile and where they lead."""
+        row, column = self.positions[source]
+        for key, rows, columns in MOVES:
+            target_row = row + rows
+            target_column = column + columns
+            if 0 <= target_row < len(self.rows) and \
+                    0 <= target_column < len(self.rows[target_row]):
+                yield key, self.rows[target_row][target_column]
+
+    def routes_from(self, start):
+        """Returns the shortest arrow key sequence to every tile."""
+        routes = {start: []}
+        queue = deque([start])
+        while queue:
+            source = queue.popleft()
+            for key, target in self.neighbours(source):
+                if target not in routes:
+                    routes[target] = routes[source] + [key]
+                    queue.append(target)
+        return routes
+
+
+class Navigator():
+    """Plans the keystrokes selecting a source through the sources menu."""
+
+    # Keystroke sequence to open sources menu
+    OPEN_SOURCES_IF_NONE = [
+        'enter',
+        'wait',
+    ]
+
+    OPEN_SOURCES_IF_SOURCE_ACTIVE = [
+        'home',
+        'wait',
+        'enter',
+        'wait',
+    ]
+
+    LAYOUTS = {
+        DEFAULT_MODEL: MenuLayout([
+            ['hdmi1', 'hdmi2', 'hdmi3', 'gallery', 'aux'],
+            ['tv', 'vga', 'av', 'dtmb'],
+        ]),
+    }
+
+    # Routes between every pair of tiles, computed once per model
+    _routes = {}
+
+    def __init__(self, source=None, model=DEFAULT_MODEL):
+        self.source = source
+        self.model = model if model in self.LAYOUTS else DEFAULT_MODEL
+
+    @classmethod
+    def routes(cls, model=DEFAULT_MODEL):
+        """Returns the shortest routes from every tile to every other."""
+        if model not in cls._routes:
+            layout = cls.LAYOUTS[model]
+            cls._routes[model] = {
+                start: layout.routes_from(start)
+                for start in layout.positions
+            }
+        return cls._routes[model]
+
+    def navigate_to_source(self, source):
+        """Returns the keystrokes selecting the source.
+
+        The menu takes a moment to appear, 'wait' tokens follow the keys
+        opening it, the arrow keys inside it are sent right away.
+        """
+        layout = self.LAYOUTS[self.model]
+
+        if self.source is None:
+            keystrokes = list(self.OPEN_SOURCES_IF_NONE)
+        else:
+            keystrokes = list(self.OPEN_SOURCES_IF_SOURCE_ACTIVE)
+
+        start = layout.origin
+        if layout.cursor_on_active and self.source in layout.positions:
+            start = self.source
+
+        return keystrokes + self.routes(self.model)[start][source] + ['enter']
@@ -0,0 +1,215 @@
+"""
+The pymitv.SimulatedTV module serves the controller API of a TV on the local
+machine, so pymitv and the integration can be measured without a real TV.
+"""
+import asyncio
+import random
+import struct
+import zlib
+from collections import Counter
+
+from aiohttp import web
+
+DEFAULT_APPS = [
+    ('YouTube', 'com.google.android.youtube.tv'),
+    ('Netflix', 'com.netflix.ninja'),
+    ('Kodi', 'org.xbmc.kodi'),
+    ('Settings', 'com.android.tv.settings'),
+    ('Mi TV', 'com.xiaomi.mitv.tvplayer'),
+]
+
+ICON_SIZE = 128
+
+
+def _png(width, height, color=(255, 103, 0)):
+    """Returns a PNG image of a single color."""
+    def chunk(kind, data):
+        return (
+            struct.pack('>I', len(data)) + kind + data
+            + struct.pack('>I', zlib.crc32(kind + data))
+        )
+
+    row = b'\x00' + bytes(color) * width
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        + chunk(b'IDAT', zlib.compress(row * height))
+        + chunk(b'IEND', b'')
+    )
+
+
+class SimulatedTV:
+    """Answers the requests of pymitv like a TV, keeping its state.
+
+    Every answer is delayed by latency plus or minus jitter seconds, fails
+    with a 500 at failure_rate, and at most max_connections requests are
+    handled at once, the others queue like on the weak server of a TV.
+    A TV turned off drops every connection but the power key.
+    """
+
+    def __init__(self, host='127.0.0.1', port=6095, latency=0.0, jitter=0.0,
+                 failure_rate=0.0, max_connections=None, apps=None,
+                 max_volume=100, supports_set_volume=True, seed=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.max_connections = max_connections
+        self.apps = DEFAULT_APPS if apps is None else apps
+        self.supports_set_volume = supports_set_volume
+
+        self.is_on = True
+        self.volume = max_volume // 4
+        self.max_volume = max_volume
+        self.source = 'hdmi1'
+        self.app = None
+
+        # Keys received, and requests answered per action
+        self.keys = []
+        self.requests = Counter()
+
+        self._random = random.Random(seed)
+        self._slots = None
+        self._runner = None
+        self._icon = _png(ICON_SIZE, ICON_SIZE)
+
+    @property
+    def ip_address(self):
+        """Returns the address pymitv reaches the TV on."""
+        return self.host
+
+    async def start(self):
+        """Starts serving the TV."""
+        if self.max_connections:
+            self._slots = asyncio.Semaphore(self.max_connections)
+        app = web.Application()
+        app.router.add_get('/controller', self._controller)
+        app.router.add_get('/general', self._general)
+        app.router.add_get('/request', self._isalive)
+        app.router.add_get('/icons/{package}.png', self._icon_image)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        if not self.port:
+            # Pick up the port the system chose
+            self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        """Stops serving the TV."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _answer(self, request, action, handler):
+        """Runs a handler under the simulated conditions."""
+        if self._slots is not None:
+            async with self._slots:
+                return await self._simulate(request, action, handler)
+        return await self._simulate(request, action, handler)
+
+    async def _simulate(self, request, action, handler):
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        power_key = request.query.get('keycode') == 'power'
+        if not self.is_on and not power_key:
+            # Unreachable, like a TV whose network is down
+            request.transport.close()
+            return web.Response(status=503)
+
+        self.requests[action] += 1
+        if self._random.random() < self.failure_rate:
+            return web.json_response(
+                {'request_result': 500, 'msg': 'error'}, status=500
+            )
+        return handler(request)
+
+    @staticmethod
+    def _success(data=None):
+        body = {'request_result': 200, 'msg': 'success'}
+        if data is not None:
+            body['data'] = data
+        return web.json_response(body)
+
+    async def _controller(self, request):
+        action = request.query.get('action')
+        handler = {
+            'keyevent': self._keyevent,
+            'changesource': self._changesource,
+            'getVolume': self._get_volume,
+            'startapp': self._startapp,
+            'getinstalledapp': self._installed_apps,
+        }.get(action)
+        if handler is None:
+            return web.json_response(
+                {'request_result': 404, 'msg': 'unknown action'}, status=404
+            )
+        return await self._answer(request, action, handler)
+
+    async def _general(self, request):
+        if request.query.get('action') != 'setVolum':
+            return web.json_response(
+                {'request_result': 404, 'msg': 'unknown action'}, status=404
+            )
+        return await self._answer(request, 'setVolum', self._set_volume)
+
+    async def _isalive(self, request):
+        return await self._answer(request, 'isalive', lambda _: (
+            self._success()
+        ))
+
+    async def _icon_image(self, request):
+        return await self._answer(request, 'icon', lambda _: web.Response(
+            body=self._icon, content_type='image/png'
+        ))
+
+    def _keyevent(self, request):
+        keycode = request.query.get('keycode', '')
+        self.keys.append(keycode)
+        if keycode == 'power':
+            self.is_on = not self.is_on
+        elif keycode == 'volumeup':
+            self.volume = min(self.volume + 1, self.max_volume)
+        elif keycode == 'volumedown':
+            self.volume = max(self.volume - 1, 0)
+        return self._success()
+
+    def _changesource(self, request):
+        self.source = request.query.get('source')
+        return self._success()
+
+    def _get_volume(self, request):
+        return self._success({
+            'volume': self.volume, 'maxVolume': self.max_volume
+        })
+
+    def _set_volume(self, request):
+        if self.supports_set_volume:
+            volume = int(request.query.get('volum', self.volume))
+            self.volume = max(0, min(volume, self.max_volume))
+        return self._success()
+
+    def _startapp(self, request):
+        package = request.query.get('packagename')
+        if package not in {package for _, package in self.apps}:
+            return web.json_response(
+                {'request_result': 404, 'msg': 'not installed'}, status=404
+            )
+        self.app = package
+        return self._success()
+
+    def _installed_apps(self, request):
+        # The TV escapes the slashes of the icon URLs
+        icon_url = 'http:\\/\\/{}:{}\\/icons\\/{{}}.png'.format(
+            self.host, self.port
+        )
+        return self._success({'AppInfo': [
+            {
+                'AppName': name,
+                'PackageName': package,
+                'IconURL': icon_url.format(package),
+            }
+            for name, package in self.apps
+        ]})
@@ -137,4 +137,4 @@ using any of the polyfill controls, could produce weird results.')
         # Save new source
         self.source = source
 
-        return self._send_keystroke(route, wait=True)
+        return self._send_keystroke(route)
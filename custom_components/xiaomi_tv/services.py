@@ -0,0 +1,225 @@
+"""Services sending commands to many Xiaomi TVs at once."""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
+from homeassistant.core import (HomeAssistant, ServiceCall, ServiceResponse,
+                                SupportsResponse, callback)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.service import async_extract_referenced_entity_ids
+
+from . import pymitv
+from .commands import Priority
+from .const import CAST_APP, DOMAIN, SERVICE_BROADCAST, SOURCES
+from .fleet import GROUP_CONCURRENCY, async_get_fleet
+
+LOGGER = logging.getLogger(__name__)
+
+ATTR_HOST = 'host'
+ATTR_KEYS = 'keys'
+ATTR_SOURCE = 'source'
+ATTR_APP = 'app'
+ATTR_POWER = 'power'
+ATTR_CONCURRENCY = 'concurrency'
+
+# Keycodes a macro may send, and its pause. The power key toggles, the
+# power field sends it only to the TVs not in the state asked for yet
+KEYS = [
+    'up', 'down', 'left', 'right', 'enter', 'back', 'home', 'menu',
+    'volumeup', 'volumedown', 'wait',
+]
+
+
+def valid_key(value: Any) -> str:
+    """Validate a key of a macro."""
+    if value == 'power':
+        raise vol.Invalid(
+            'The power key toggles the TVs, use power: on or off instead')
+    return vol.In(KEYS)(value)
+
+
+BROADCAST_SCHEMA = vol.All(
+    vol.Schema({
+        **cv.ENTITY_SERVICE_FIELDS,
+        vol.Optional(ATTR_HOST): vol.All(cv.ensure_list, [cv.string]),
+        vol.Exclusive(ATTR_KEYS, 'command'): vol.All(
+            cv.ensure_list_csv, [valid_key], vol.Length(min=1)),
+        vol.Exclusive(ATTR_SOURCE, 'command'): vol.In(SOURCES),
+        vol.Exclusive(ATTR_APP, 'command'): cv.string,
+        vol.Exclusive(ATTR_POWER, 'command'): vol.In(['on', 'off']),
+        vol.Optional(ATTR_CONCURRENCY, default=GROUP_CONCURRENCY): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=64)),
+    }),
+    cv.has_at_least_one_key(ATTR_KEYS, ATTR_SOURCE, ATTR_APP, ATTR_POWER),
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+    if hass.services.has_service(DOMAIN, SERVICE_BROADCAST):
+        return
+
+    async def _async_broadcast(call: ServiceCall) -> ServiceResponse:
+        return await async_broadcast(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BROADCAST,
+        _async_broadcast,
+        schema=BROADCAST_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+async def async_broadcast(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """Send a key macro, a source, an app or a power command to many TVs.
+
+    The TVs are targeted by entity, device or area, or by address, and all
+    of them when nothing is targeted. The command is sent to at most
+    `concurrency` TVs at once, each through its own command queue, and a
+    power command only to the TVs not in that state yet. Returns whether
+    each TV took the command and how long after the call it did.
+    """
+    fleet = async_get_fleet(hass)
+    hosts = _async_target_hosts(hass, call)
+    unknown = [host for host in hosts if host not in fleet.hosts]
+    if unknown:
+        raise HomeAssistantError(
+            f'Unknown Xiaomi TV: {", ".join(unknown)}')
+
+    command, priority, key = _command(call.data)
+    targets = hosts
+    if ATTR_POWER in call.data:
+        # The power key toggles, it must not reach TVs already in the state
+        targets = fleet.async_power_changes(
+            hosts, call.data[ATTR_POWER] == 'on')
+    finished: dict[str, float] = {}
+    started = time.monotonic()
+
+    async def timed(tv: pymitv.AsyncTV) -> Any:
+        try:
+            return await command(tv)
+        finally:
+            finished[tv.ip_address] = time.monotonic() - started
+
+    results = await fleet.async_run(
+        timed, targets, priority, key, call.data[ATTR_CONCURRENCY])
+    duration = time.monotonic() - started
+    _async_record(hass, call.data, results)
+
+    response: dict[str, Any] = {}
+    for host in hosts:
+        if host not in results:
+            response[host] = {
+                'success': True, 'skipped': True, 'duration': 0.0}
+            continue
+        result = results[host]
+        response[host] = {
+            'success': _succeeded(result),
+            'duration': round(finished.get(host, duration), 3),
+        }
+        if isinstance(result, BaseException):
+            response[host]['error'] = str(result) or type(result).__name__
+        elif result is False:
+            response[host]['error'] = 'The TV rejected the command'
+
+    failed = [host for host, item in response.items() if not item['success']]
+    if failed:
+        LOGGER.warning(
+            'Broadcast failed on %d of %d TVs: %s',
+            len(failed), len(response), ', '.join(failed))
+    if not call.return_response:
+        return None
+    return {
+        'duration': round(duration, 3),
+        'succeeded': len(response) - len(failed),
+        'failed': len(failed),
+        'results': response,
+    }
+
+
+@callback
+def _async_target_hosts(hass: HomeAssistant, call: ServiceCall) -> list[str]:
+    """Return the addresses of the TVs the call targets."""
+    hosts = list(call.data.get(ATTR_HOST, []))
+    if any(call.data.get(str(field)) for field in cv.ENTITY_SERVICE_FIELDS):
+        selected = async_extract_referenced_entity_ids(hass, call)
+        registry = er.async_get(hass)
+        for entity_id in sorted(
+            selected.referenced | selected.indirectly_referenced
+        ):
+            entry = registry.async_get(entity_id)
+            if entry is None or entry.platform != DOMAIN:
+                continue
+            # Unique IDs are made of the domain, the address and the class
+            hosts.append(
+                entry.unique_id.removeprefix(f'{DOMAIN}_').rpartition('_')[0])
+    elif not hosts:
+        hosts = async_get_fleet(hass).hosts
+    return list(dict.fromkeys(hosts))
+
+
+def _command(
+    data: dict[str, Any]
+) -> tuple[Callable[[pymitv.AsyncTV], Awaitable[Any]], Priority, Any]:
+    """Return the command of the call, its priority and its queue key."""
+    if ATTR_KEYS in data:
+        keys = data[ATTR_KEYS]
+
+        async def send_keys(tv: pymitv.AsyncTV) -> bool:
+            return await tv.control.send_keystrokes(tv.ip_address, keys)
+
+        return send_keys, Priority.NAVIGATION, None
+    if ATTR_POWER in data:
+        if data[ATTR_POWER] == 'on':
+            return pymitv.AsyncTV.wake, Priority.POWER, ('power', 'wake')
+        return pymitv.AsyncTV.sleep, Priority.POWER, ('power', 'sleep')
+    source = data.get(ATTR_SOURCE)
+    if source is not None and source != 'cast':
+        async def change_source(tv: pymitv.AsyncTV) -> bool:
+            return await tv.change_source(source)
+
+        return change_source, Priority.NAVIGATION, ('source', source)
+    package = CAST_APP if source == 'cast' else data[ATTR_APP]
+
+    async def start_app(tv: pymitv.AsyncTV) -> bool:
+        return await tv.start_app(package)
+
+    return start_app, Priority.NAVIGATION, ('app', package)
+
+
+@callback
+def _async_record(
+    hass: HomeAssistant, data: dict[str, Any], results: dict[str, Any]
+) -> None:
+    """Remember the state the command left the TVs in."""
+    fleet = async_get_fleet(hass)
+    if ATTR_POWER in data:
+        fleet.async_expect_power(results, data[ATTR_POWER] == 'on')
+        return
+    for host, result in results.items():
+        if ATTR_SOURCE in data and _succeeded(result):
+            hass.data[DOMAIN][f'{DOMAIN}_{host}'].update(
+                {'source': data[ATTR_SOURCE]})
+        if ATTR_APP in data:
+            apps = fleet.async_get_coordinator(host).apps
+            if _succeeded(result):
+                apps.async_launched(data[ATTR_APP])
+            else:
+                # The app may be gone, refresh the list on the next browse.
+                apps.async_invalidate()
+
+
+def _succeeded(result: Any) -> bool:
+    """Return whether a TV took the command."""
+    return not isinstance(result, BaseException) and result is not False
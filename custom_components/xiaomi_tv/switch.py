@@ -6,8 +6,11 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity import ToggleEntity
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
+from .coordinator import XiaomiTVCoordinator
+from .fleet import async_get_coordinator
 
 LOGGER = logging.getLogger(__name__)
 
@@ -21,12 +24,15 @@ async def async_setup_entry(hass: HomeAssistant,
     return True
 
 
-class XiaomiTVStatusSwitch(ToggleEntity, RestoreEntity):
+class XiaomiTVStatusSwitch(
+    CoordinatorEntity[XiaomiTVCoordinator], ToggleEntity, RestoreEntity
+):
 
     _attr_name = 'Reset status'
     _attr_icon = 'mdi:television'
 
     def __init__(self, ip: str, name: str, hass: HomeAssistant):
+        super().__init__(async_get_coordinator(hass, ip))
         self._ip = ip
         self._name = name
         self._config_id = f'{DOMAIN}_{self._ip}'
@@ -51,10 +57,12 @@ class XiaomiTVStatusSwitch(ToggleEntity, RestoreEntity):
     async def async_turn_on(self) -> None:
         """Turn the entity on."""
         self._hass.data[DOMAIN][self._config_id].update({'state': STATE_ON})
+        self.coordinator.tv.probe.expect(True)
 
     async def async_turn_off(self) -> None:
         """Turn the entity off."""
         self._hass.data[DOMAIN][self._config_id].update({'state': STATE_OFF})
+        self.coordinator.tv.probe.expect(False)
 
     @property
     def is_on(self):
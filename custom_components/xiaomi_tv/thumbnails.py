@@ -0,0 +1,104 @@
+"""Resized variants of the app icons served by the proxy."""
+
+from __future__ import annotations
+
+import io
+import logging
+import warnings
+from dataclasses import dataclass
+
+LOGGER = logging.getLogger(__name__)
+
+# Largest width or height a client may ask for
+MAX_DIMENSION = 1024
+
+FORMATS = {
+    'png': 'image/png',
+    'webp': 'image/webp',
+}
+
+
+@dataclass(frozen=True)
+class Variant:
+    """Size and format a client wants an icon in."""
+
+    width: int | None = None
+    height: int | None = None
+    image_format: str = 'png'
+
+    @property
+    def content_type(self) -> str:
+        """Return the content type of the variant."""
+        return FORMATS[self.image_format]
+
+    def key(self, url: str) -> str:
+        """Return the cache key of the variant of an icon."""
+        return (
+            f'{url}#w={self.width or ""}&h={self.height or ""}'
+            f'&format={self.image_format}'
+        )
+
+
+def parse_variant(query) -> Variant | None:
+    """Return the variant asked by the w, h and format parameters.
+
+    Returns None when the original icon is wanted, raises ValueError on
+    invalid parameters.
+    """
+    if not {'w', 'h', 'format'} & query.keys():
+        return None
+    width = _dimension(query.get('w'))
+    height = _dimension(query.get('h'))
+    image_format = query.get('format', 'png').lower()
+    if image_format not in FORMATS:
+        raise ValueError(f'Unsupported format {image_format}')
+    return Variant(width, height, image_format)
+
+
+def _dimension(value: str | None) -> int | None:
+    """Return a width or height parameter."""
+    if not value:
+        return None
+    dimension = int(value)
+    if not 0 < dimension <= MAX_DIMENSION:
+        raise ValueError(f'Dimension out of range {dimension}')
+    return dimension
+
+
+def resize(body: bytes, variant: Variant) -> bytes | None:
+    """Return the icon in the size and format of the variant.
+
+    The aspect ratio is kept and icons are never enlarged. Returns None
+    when Pillow is missing or can't handle the icon, including one that
+    decompresses to more pixels than Pillow allows, so the original is
+    served instead. Blocking, run it in the executor.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        LOGGER.debug('Pillow is not installed, serving original icons')
+        return None
+
+    try:
+        with warnings.catch_warnings():
+            # Pillow only warns up to twice its pixel limit, refuse those too
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            with Image.open(io.BytesIO(body)) as image:
+                image.thumbnail((
+                    variant.width or MAX_DIMENSION,
+                    variant.height or MAX_DIMENSION,
+                ))
+                if image.mode not in ('RGB', 'RGBA'):
+                    image = image.convert('RGBA')
+                output = io.BytesIO()
+                image.save(output, format=variant.image_format.upper())
+    except (
+        OSError,
+        ValueError,
+        KeyError,
+        Image.DecompressionBombError,
+        Image.DecompressionBombWarning,
+    ) as error:
+        LOGGER.debug('Cannot resize icon: %s', error)
+        return None
+    return output.getvalue()